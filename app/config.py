@@ -11,6 +11,10 @@ class Config:
     BEDROCK_REGION: str = os.getenv("BEDROCK_REGION", "us-east-1")  # Bedrock-specific region
     EMBEDDING_MODEL_ID: str = os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
     CHAT_MODEL_ID: str = os.getenv("CHAT_MODEL_ID", "anthropic.claude-3-5-sonnet-20240620-v1:0")
+    # Mark system prompts as Bedrock prompt-cache checkpoints (only for models that support caching)
+    BEDROCK_PROMPT_CACHING: bool = os.getenv("BEDROCK_PROMPT_CACHING", "0") == "1"
+    # Bedrock inference latency profile: "optimized" or "standard"
+    BEDROCK_LATENCY: str = os.getenv("BEDROCK_LATENCY", "optimized")
     
     # CORS configuration
     CORS_ORIGINS: list[str] = [
@@ -24,5 +28,23 @@ class Config:
     # API configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    
+    # Serve similarity search from an in-memory NumPy matrix instead of pgvector (small catalogs)
+    IN_MEMORY_VECTOR_SEARCH: bool = os.getenv("IN_MEMORY_VECTOR_SEARCH", "0") == "1"
+    
+    # Number of async pool connections to open at startup (0 = open lazily on first use)
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", "0"))
+    
+    # Build the chat agent and send one embedding request at startup instead of on the first chat
+    BEDROCK_WARMUP: bool = os.getenv("BEDROCK_WARMUP", "0") == "1"
+    
+    # Minimum cosine similarity for a tool call to be served from the semantic cache
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    
+    # Keep sessions in Redis instead of process memory (needed for more than one worker)
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    
+    # Run schema setup (extension, tables, indexes) once at startup when set to 1
+    INIT_DB: bool = os.getenv("INIT_DB", "0") == "1"
 
 config = Config()
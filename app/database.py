@@ -1,40 +1,120 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy import create_engine, Column, Integer, JSON, text, func
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session as SQLSession
+from typing import List, Optional, Dict, Any, Tuple, Iterator
+import asyncio
+from sqlalchemy import create_engine, Integer, Float, JSON, text, insert, select, delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
-from pgvector.sqlalchemy import Vector
 import logging
+import math
 
-from app.models.db_models import Product, Outlet, Base
+import numpy as np
+
+from app.models.db_models import Product, Base
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def normalize_embedding(embedding: List[float]) -> List[float]:
+    """Scale an embedding to unit L2 norm so inner product equals cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in embedding))
+    if norm == 0:
+        return list(embedding)
+    return [x / norm for x in embedding]
+
 class Database:
     """Database class for managing products with embeddings using PostgreSQL and pgvector."""
     
-    def __init__(self, db_url: str):
+    # Database URLs whose schema create_tables has already set up in this process
+    _initialized_urls: set = set()
+    
+    def __init__(self, db_url: str, pool_size: int = 10, max_overflow: int = 20):
         """
         Initialize the ProductDatabase.
         
         Args:
             db_url: PostgreSQL connection string
-            vector_dimension: Dimension of the embedding vectors
+            pool_size: Number of connections kept open in the pool
+            max_overflow: Extra connections allowed above pool_size under bursts
         """
         self.db_url = db_url
         self.vector_dimension = 512
+        self.hnsw_ef_search = 40
         
-        # Initialize database
-        self.engine = create_engine(db_url)
-        self.Session = sessionmaker(bind=self.engine)
+        # Optional in-process copy of all embeddings (see load_embedding_matrix)
+        self._emb_matrix: Optional[np.ndarray] = None
+        self._emb_ids: List[int] = []
+        self._emb_chunks: List[Dict[Any, Any]] = []
+        
+        # Bumped whenever the product table changes through this instance, so
+        # callers caching product results know to drop them
+        self.products_version = 0
+        
+        # Initialize database with an explicit pool so concurrent chats reuse
+        # connections instead of paying a new TCP+TLS+auth handshake to RDS.
+        # pre_ping drops connections RDS closed while idle; recycle stays under
+        # typical idle timeouts. Multi-row INSERTs (including bulk_add_products'
+        # INSERT ... RETURNING) go out as pages of 500 VALUES rows rather than one
+        # statement per row. On psycopg2, executemany UPDATEs and DELETEs are also
+        # batched through execute_batch; other drivers don't accept those options.
+        driver_options = {}
+        if make_url(db_url).get_driver_name() == "psycopg2":
+            driver_options = {"executemany_mode": "values_plus_batch", "executemany_batch_page_size": 500}
+        self.engine = create_engine(
+            db_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=30,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            insertmanyvalues_page_size=500,
+            **driver_options,
+        )
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+
+        # Async engine (asyncpg) for the read paths the agent tools hit, so parallel
+        # tool calls overlap their database waits instead of blocking the event loop.
+        # Each connection caches its prepared statements; model-generated outlet SQL is
+        # mostly one-off, so the cache is sized well above asyncpg's default 100 to keep
+        # the fixed search queries from being evicted by it.
+        self.async_engine = create_async_engine(
+            make_url(db_url).set(drivername="postgresql+asyncpg"),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=30,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            connect_args={"prepared_statement_cache_size": 500},
+        )
+        self.AsyncSession = async_sessionmaker(bind=self.async_engine, expire_on_commit=False)
 
         self.base = Base
 
 
+    def _schema_ready(self) -> bool:
+        """Check in one query whether the tables, halfvec column, indexes and view all exist."""
+        relations = [*self.base.metadata.tables, "product_embedding_ip_hnsw",
+                     "product_embedding_l2_hnsw", "mv_products_summary", "mv_products_summary_id"]
+        checks = " AND ".join(f"to_regclass('{name}') IS NOT NULL" for name in relations)
+        with self.engine.connect() as conn:
+            return bool(conn.execute(text(
+                f"SELECT {checks} "
+                "AND to_regclass('product_embedding_cosine_hnsw') IS NULL "
+                "AND EXISTS (SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'product' AND column_name = 'embedding' AND udt_name = 'halfvec')"
+            )).scalar())
+
     def create_tables(self):
         """Create database tables and enable pgvector extension."""
+        # Already set up, by this process or an earlier deploy: skip the DDL and its table locks
+        if self.db_url in Database._initialized_urls:
+            return
+        if self._schema_ready():
+            Database._initialized_urls.add(self.db_url)
+            logger.info("Database schema already up to date")
+            return
+        
         try:
             # Enable pgvector extension
             with self.engine.connect() as conn:
@@ -43,6 +123,52 @@ class Database:
             
             # Create tables
             self.base.metadata.create_all(self.engine)
+
+            with self.engine.connect() as conn:
+                # Migrate embeddings created as full-precision vector(512) to halfvec(512)
+                column_type = conn.execute(text(
+                    "SELECT udt_name FROM information_schema.columns "
+                    "WHERE table_name = 'product' AND column_name = 'embedding'"
+                )).scalar()
+                if column_type == "vector":
+                    # vector opclasses don't accept halfvec, so every index on the column
+                    # (including the old cosine index or any unnamed one) must go first
+                    embedding_indexes = conn.execute(text(
+                        "SELECT indexname FROM pg_indexes "
+                        "WHERE tablename = 'product' AND indexdef LIKE '%(embedding%'"
+                    )).scalars().all()
+                    for index_name in embedding_indexes:
+                        conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+                    conn.execute(text(
+                        f"ALTER TABLE product ALTER COLUMN embedding TYPE halfvec({self.vector_dimension}) "
+                        f"USING embedding::halfvec({self.vector_dimension})"
+                    ))
+                    logger.info("Migrated product.embedding to halfvec")
+
+                # HNSW indexes so similarity search is an approximate graph walk instead of a full scan.
+                # Embeddings are unit length, so cosine search runs on the cheaper inner-product opclass.
+                conn.execute(text("DROP INDEX IF EXISTS product_embedding_cosine_hnsw"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS product_embedding_ip_hnsw ON product "
+                    "USING hnsw (embedding halfvec_ip_ops) WITH (m = 16, ef_construction = 64)"
+                ))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS product_embedding_l2_hnsw ON product "
+                    "USING hnsw (embedding halfvec_l2_ops) WITH (m = 16, ef_construction = 64)"
+                ))
+
+                # Narrow, embedding-free view backing the product listing tool; the
+                # unique index allows REFRESH ... CONCURRENTLY
+                conn.execute(text(
+                    "CREATE MATERIALIZED VIEW IF NOT EXISTS mv_products_summary AS "
+                    "SELECT id, chunk->>'name' AS name, chunk->>'sale_price' AS sale_price, chunk "
+                    "FROM product WITH DATA"
+                ))
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS mv_products_summary_id ON mv_products_summary (id)"
+                ))
+                conn.commit()
+            Database._initialized_urls.add(self.db_url)
             logger.info("Database tables created successfully")
             
         except SQLAlchemyError as e:
@@ -50,10 +176,13 @@ class Database:
             raise
 
             
-    def search_similar_products(self, query_embedding: List[float], limit: int = 10, threshold: float = 0.5) -> List[Tuple[int, Dict[Any, Any], float]]:
+    async def search_similar_products(self, query_embedding: List[float], limit: int = 10, threshold: float = 0.5) -> List[Tuple[int, Dict[Any, Any], float]]:
         """
         Search for similar products using cosine similarity.
         
+        Stored embeddings are unit length, so cosine similarity equals the inner
+        product and is computed with pgvector's <#> operator (no per-row norms).
+        
         Args:
             query_embedding: Pre-computed embedding vector for the query
             limit: Maximum number of results
@@ -62,34 +191,162 @@ class Database:
         Returns:
             List of tuples (product_id, chunk, similarity_score)
         """
-        session = self.Session()
+        # Validate embedding dimension
+        if len(query_embedding) != self.vector_dimension:
+            raise ValueError(f"Query embedding dimension {len(query_embedding)} does not match expected {self.vector_dimension}")
+        
+        session = self.AsyncSession()
         try:
+            # Widen the HNSW candidate list for this transaction only
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {self.hnsw_ef_search}"))
+            
+            # Compute the distance once and order by its label (ORDER BY distance),
+            # a plain ORDER BY ... LIMIT that the HNSW index can serve.
+            # <#> returns the negative inner product.
+            distance = Product.embedding.max_inner_product(normalize_embedding(query_embedding)).label('distance')
+            results = (await session.execute(
+                select(Product.id, Product.chunk, distance).order_by(distance).limit(limit)
+            )).all()
+            
+            return [
+                (r.id, r.chunk, -r.distance) for r in results
+                if -r.distance >= threshold
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error searching products: {e}")
+            raise
+        finally:
+            await session.close()
+    
+    def load_embedding_matrix(self):
+        """
+        Load every product embedding into a single row-normalized float32 matrix.
+        
+        For small catalogs a BLAS matrix-vector product over this matrix is faster
+        than a per-row distance scan in Postgres (see search_similar_products_numpy).
+        """
+        ids, chunks, embeddings = [], [], []
+        for product_id, chunk, embedding in self.iter_all_products_with_embeddings():
+            ids.append(product_id)
+            chunks.append(chunk)
+            embeddings.append(embedding)
+        
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), self.vector_dimension)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        
+        self._emb_matrix = matrix / norms
+        self._emb_ids = ids
+        self._emb_chunks = chunks
+        logger.info(f"Loaded {len(ids)} product embeddings into memory")
+    
+    @property
+    def has_embedding_matrix(self) -> bool:
+        """Whether load_embedding_matrix has been called."""
+        return self._emb_matrix is not None
+    
+    def search_similar_products_numpy(self, query_embedding: List[float], limit: int = 10, threshold: float = 0.5) -> List[Tuple[int, Dict[Any, Any], float]]:
+        """
+        Search for similar products using cosine similarity over the in-memory matrix.
+        
+        Args:
+            query_embedding: Pre-computed embedding vector for the query
+            limit: Maximum number of results
+            threshold: Minimum similarity threshold (0-1)
+            
+        Returns:
+            List of tuples (product_id, chunk, similarity_score)
+        """
+        if self._emb_matrix is None:
+            raise RuntimeError("Embedding matrix not loaded; call load_embedding_matrix() first")
+        
+        # Validate embedding dimension
+        if len(query_embedding) != self.vector_dimension:
+            raise ValueError(f"Query embedding dimension {len(query_embedding)} does not match expected {self.vector_dimension}")
+        
+        query = np.asarray(normalize_embedding(query_embedding), dtype=np.float32)
+        scores = self._emb_matrix @ query
+        
+        k = min(limit, len(scores))
+        if k == 0:
+            return []
+        
+        # argpartition selects the top k in O(N); only those k are sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return [
+            (self._emb_ids[i], self._emb_chunks[i], float(scores[i])) for i in top
+            if scores[i] >= threshold
+        ]
+    
+    async def search_similar_products_batch(self, query_embeddings: List[List[float]], limit: int = 10, threshold: float = 0.5) -> List[List[Tuple[int, Dict[Any, Any], float]]]:
+        """
+        Search for similar products for several query embeddings in one round trip.
+        
+        The query vectors are unnested and each one drives an index-ordered
+        LATERAL top-k over the product table.
+        
+        Args:
+            query_embeddings: Pre-computed embedding vectors, one per query
+            limit: Maximum number of results per query
+            threshold: Minimum similarity threshold (0-1)
+            
+        Returns:
+            One list of tuples (product_id, chunk, similarity_score) per query, in input order
+        """
+        if not query_embeddings:
+            return []
+        
+        for query_embedding in query_embeddings:
             # Validate embedding dimension
             if len(query_embedding) != self.vector_dimension:
                 raise ValueError(f"Query embedding dimension {len(query_embedding)} does not match expected {self.vector_dimension}")
+        
+        if self.has_embedding_matrix:
+            return [self.search_similar_products_numpy(q, limit=limit, threshold=threshold) for q in query_embeddings]
+        
+        # halfvec[] array literal, bound as text and cast server-side
+        queries_literal = "{" + ",".join(
+            '"[' + ",".join(str(x) for x in normalize_embedding(q)) + ']"' for q in query_embeddings
+        ) + "}"
+        
+        session = self.AsyncSession()
+        try:
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {self.hnsw_ef_search}"))
             
-            # Search using cosine similarity
-            results = session.query(
-                Product.id,
-                Product.chunk,
-                (1 - Product.embedding.cosine_distance(query_embedding)).label('similarity')
-            ).filter(
-                (1 - Product.embedding.cosine_distance(query_embedding)) >= threshold
-            ).order_by(
-                Product.embedding.cosine_distance(query_embedding)
-            ).limit(limit).all()
+            # <#> returns the negative inner product (embeddings are unit length)
+            results = (await session.execute(
+                text(
+                    "SELECT q.ord, p.id, p.chunk, p.distance "
+                    f"FROM unnest(CAST(CAST(:queries AS text) AS halfvec({self.vector_dimension})[])) "
+                    "WITH ORDINALITY AS q(embedding, ord) "
+                    "CROSS JOIN LATERAL ("
+                    "SELECT id, chunk, embedding <#> q.embedding AS distance "
+                    "FROM product ORDER BY distance LIMIT :limit"
+                    ") p "
+                    "ORDER BY q.ord, p.distance"
+                ).columns(ord=Integer, id=Integer, chunk=JSON, distance=Float),
+                {"queries": queries_literal, "limit": limit}
+            )).all()
             
-            return [(r.id, r.chunk, r.similarity) for r in results]
+            grouped: List[List[Tuple[int, Dict[Any, Any], float]]] = [[] for _ in query_embeddings]
+            for r in results:
+                if -r.distance >= threshold:
+                    grouped[r.ord - 1].append((r.id, r.chunk, -r.distance))
+            return grouped
             
         except Exception as e:
-            logger.error(f"Error searching products: {e}")
+            logger.error(f"Error batch searching products: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
     
-    def search_similar_products_l2(self, query_embedding: List[float], limit: int = 10, max_distance: float = 1.0) -> List[Tuple[int, Dict[Any, Any], float]]:
+    async def search_similar_products_l2(self, query_embedding: List[float], limit: int = 10, max_distance: float = 1.0) -> List[Tuple[int, Dict[Any, Any], float]]:
         """
-        Search for similar products using L2 (Euclidean) distance.
+        Search for similar products using L2 (Euclidean) distance between unit vectors
+        (0 for identical direction, up to 2 for opposite).
         
         Args:
             query_embedding: Pre-computed embedding vector for the query
@@ -99,30 +356,28 @@ class Database:
         Returns:
             List of tuples (product_id, chunk, l2_distance)
         """
-        session = self.Session()
+        session = self.AsyncSession()
         try:
             # Validate embedding dimension
             if len(query_embedding) != self.vector_dimension:
                 raise ValueError(f"Query embedding dimension {len(query_embedding)} does not match expected {self.vector_dimension}")
             
-            # Search using L2 distance
-            results = session.query(
-                Product.id,
-                Product.chunk,
-                Product.embedding.l2_distance(query_embedding).label('distance')
-            ).filter(
-                Product.embedding.l2_distance(query_embedding) <= max_distance
-            ).order_by(
-                Product.embedding.l2_distance(query_embedding)
-            ).limit(limit).all()
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {self.hnsw_ef_search}"))
             
-            return [(r.id, r.chunk, r.distance) for r in results]
+            # Search using L2 distance, computed once per row. Stored embeddings are unit
+            # length, so the query is normalized too for max_distance to mean the same thing.
+            distance = Product.embedding.l2_distance(normalize_embedding(query_embedding)).label('distance')
+            results = (await session.execute(
+                select(Product.id, Product.chunk, distance).order_by(distance).limit(limit)
+            )).all()
+            
+            return [(r.id, r.chunk, r.distance) for r in results if r.distance <= max_distance]
             
         except Exception as e:
             logger.error(f"Error searching products with L2 distance: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
                 
     def delete_product(self, product_id: int) -> bool:
         """
@@ -136,14 +391,17 @@ class Database:
         """
         session = self.Session()
         try:
-            product = session.query(Product).filter(Product.id == product_id).first()
+            # Single DELETE ... RETURNING round trip; the row (and its embedding) is never loaded
+            deleted_id = session.execute(
+                delete(Product).where(Product.id == product_id).returning(Product.id)
+            ).scalar_one_or_none()
+            session.commit()
             
-            if not product:
+            if deleted_id is None:
                 return False
             
-            session.delete(product)
-            session.commit()
             logger.info(f"Deleted product {product_id}")
+            self.refresh_products()
             return True
             
         except Exception as e:
@@ -153,7 +411,7 @@ class Database:
         finally:
             session.close()
     
-    def get_all_products(self, limit: int = 100, offset: int = 0) -> List[Tuple[int, Dict[Any, Any]]]:
+    async def get_all_products(self, limit: int = 100, offset: int = 0) -> List[Tuple[int, Dict[Any, Any]]]:
         """
         Get all products with pagination.
         
@@ -164,15 +422,19 @@ class Database:
         Returns:
             List of tuples (product_id, chunk)
         """
-        session = self.Session()
+        session = self.AsyncSession()
         try:
-            results = session.query(Product.id, Product.chunk).limit(limit).offset(offset).all()
+            results = (await session.execute(
+                text("SELECT id, chunk FROM mv_products_summary ORDER BY id LIMIT :limit OFFSET :offset")
+                .columns(id=Integer, chunk=JSON),
+                {"limit": limit, "offset": offset}
+            )).all()
             return [(r.id, r.chunk) for r in results]
         except Exception as e:
             logger.error(f"Error getting all products: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
     
     def get_all_products_with_embeddings(self, limit: int = 100, offset: int = 0) -> List[Tuple[int, Dict[Any, Any], List[float]]]:
         """
@@ -185,10 +447,34 @@ class Database:
         Returns:
             List of tuples (product_id, chunk, embedding)
         """
+        return list(self.iter_all_products_with_embeddings(limit=limit, offset=offset))
+    
+    def iter_all_products_with_embeddings(self, limit: Optional[int] = None, offset: int = 0, batch_size: int = 256) -> Iterator[Tuple[int, Dict[Any, Any], List[float]]]:
+        """
+        Stream products with their embeddings through a server-side cursor.
+        
+        Only batch_size rows are held in memory at a time, instead of every
+        embedding in the result set.
+        
+        Args:
+            limit: Maximum number of products to return (None for all)
+            offset: Number of products to skip
+            batch_size: Rows fetched from the cursor per round trip
+            
+        Yields:
+            Tuples (product_id, chunk, embedding)
+        """
         session = self.Session()
         try:
-            results = session.query(Product.id, Product.chunk, Product.embedding).limit(limit).offset(offset).all()
-            return [(r.id, r.chunk, r.embedding) for r in results]
+            query = select(Product.id, Product.chunk, Product.embedding).order_by(Product.id).offset(offset)
+            if limit is not None:
+                query = query.limit(limit)
+            
+            results = session.execute(
+                query.execution_options(stream_results=True, yield_per=batch_size)
+            )
+            for r in results:
+                yield (r.id, r.chunk, r.embedding)
         except Exception as e:
             logger.error(f"Error getting all products with embeddings: {e}")
             raise
@@ -207,24 +493,24 @@ class Database:
         """
         session = self.Session()
         try:
-            product_objects = []
+            rows = []
             
             for chunk, embedding in products:
                 # Validate embedding dimension
                 if len(embedding) != self.vector_dimension:
                     raise ValueError(f"Embedding dimension {len(embedding)} does not match expected {self.vector_dimension}")
                 
-                product = Product(
-                    chunk=chunk,
-                    embedding=embedding
-                )
-                product_objects.append(product)
+                rows.append({"chunk": chunk, "embedding": normalize_embedding(embedding)})
             
-            session.bulk_save_objects(product_objects, return_defaults=True)
+            if not rows:
+                return []
+            
+            # One batched INSERT ... VALUES ... RETURNING per page instead of a round trip per row
+            product_ids = list(session.execute(insert(Product).returning(Product.id), rows).scalars().all())
             session.commit()
             
-            product_ids = [p.id for p in product_objects]
             logger.info(f"Added {len(product_ids)} products in bulk")
+            self.refresh_products()
             return product_ids
             
         except Exception as e:
@@ -233,9 +519,24 @@ class Database:
             raise
         finally:
             session.close()
+
+    def refresh_products(self):
+        """Refresh the product summary materialized view after the product table changes."""
+        self.products_version += 1
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_products_summary"))
+                conn.commit()
+            logger.info("Refreshed mv_products_summary")
+            
+            if self.has_embedding_matrix:
+                self.load_embedding_matrix()
+        except SQLAlchemyError as e:
+            logger.error(f"Error refreshing product summary view: {e}")
+            raise
         
 
-    def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None, fetch: bool = True) -> Optional[List[Any]]:
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None, fetch: bool = True, max_rows: Optional[int] = None) -> Optional[List[Any]]:
         """
         Execute a custom SQL query.
         
@@ -243,35 +544,45 @@ class Database:
             query: SQL query string
             params: Optional dictionary of parameters for parameterized queries
             fetch: Whether to fetch and return results (True) or just execute (False)
+            max_rows: If set, read at most this many rows through a server-side cursor
+                instead of transferring the whole result set
             
         Returns:
             List of results if fetch=True, None if fetch=False
         """
-        session = self.Session()
+        session = self.AsyncSession()
         try:
+            if fetch and max_rows is not None:
+                result = await session.stream(text(query), params or {})
+                rows = await result.fetchmany(max_rows)
+                await result.close()
+                await session.commit()
+                logger.info(f"Executed query successfully, returned {len(rows)} rows (max {max_rows})")
+                return rows
+            
             if params:
-                result = session.execute(text(query), params)
+                result = await session.execute(text(query), params)
             else:
-                result = session.execute(text(query))
+                result = await session.execute(text(query))
             
             if fetch:
                 # Fetch all results
                 rows = result.fetchall()
-                session.commit()
+                await session.commit()
                 logger.info(f"Executed query successfully, returned {len(rows)} rows")
                 return rows
             else:
                 # Just execute without fetching (for INSERT, UPDATE, DELETE, etc.)
-                session.commit()
+                await session.commit()
                 logger.info("Query executed successfully")
                 return None
                 
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error executing query: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
 
 
     def close(self):
@@ -279,6 +590,21 @@ class Database:
         self.engine.dispose()
         logger.info("Database connections closed")
 
+    async def warm_up(self, connections: int):
+        """
+        Open connections in the async pool ahead of traffic, so the first requests
+        don't pay connection and TLS setup. At most pool_size connections are kept.
+        """
+        connections = min(connections, self.async_engine.pool.size())
+        conns = await asyncio.gather(*(self.async_engine.connect() for _ in range(connections)))
+        await asyncio.gather(*(conn.close() for conn in conns))
+        logger.info(f"Warmed up {connections} database connections")
+
+    async def aclose(self):
+        """Close database connections, including the async pool."""
+        await self.async_engine.dispose()
+        self.close()
+
 # Usage example
 if __name__ == "__main__":
     # Initialize database
@@ -1,18 +1,81 @@
 """
 Shared dependencies for the FastAPI application
+
+Heavy modules (pydantic_ai, boto3, SQLAlchemy/pgvector) are imported inside the
+factories so importing the app stays cheap; each instance is built on first use.
+
+The providers used with Depends() are async so FastAPI calls them on the event loop;
+sync dependencies are dispatched to the threadpool on every request.
 """
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import TYPE_CHECKING, Optional
+
 from app.features.sessions.session_manager import SessionManager
-from app.features.chat.chat_service.agent_run import ChatAgent
 from app.config import config
 
-# Global instances
-session_manager = SessionManager()
-chat_service = ChatAgent(config.CHAT_MODEL_ID)
+if TYPE_CHECKING:
+    from pydantic_ai.models.bedrock import BedrockConverseModel
+    from app.database import Database
+    from app.embedding import Embeddings
+    from app.features.chat.chat_service.agent_run import ChatAgent
+    from app.features.sessions.redis_session_manager import RedisSessionManager
 
-def get_session_manager() -> SessionManager:
+@functools.lru_cache(maxsize=1)
+def _session_manager() -> SessionManager | RedisSessionManager:
+    if config.REDIS_URL:
+        from app.features.sessions.redis_session_manager import RedisSessionManager
+
+        return RedisSessionManager(config.REDIS_URL)
+    return SessionManager()
+
+async def get_session_manager() -> SessionManager | RedisSessionManager:
     """Dependency to get the shared session manager instance"""
-    return session_manager
+    return _session_manager()
+
+@functools.lru_cache(maxsize=1)
+def get_database() -> Database:
+    """Get the shared database instance (one engine and connection pool per process)"""
+    from app.database import Database
+
+    database = Database(config.DB_URL)
+    if config.IN_MEMORY_VECTOR_SEARCH:
+        database.load_embedding_matrix()
+    return database
+
+@functools.lru_cache(maxsize=1)
+def get_embedding_model() -> Embeddings:
+    """Get the shared Bedrock embedding client"""
+    from app.embedding import Embeddings
+
+    return Embeddings(config.BEDROCK_REGION, config.EMBEDDING_MODEL_ID)
+
+@functools.lru_cache(maxsize=None)
+def get_bedrock_model(model_id: str) -> BedrockConverseModel:
+    """Get the shared Bedrock chat model for model_id, reused by every agent"""
+    from app.features.chat.chat_service.agent_run import build_bedrock_model
+
+    return build_bedrock_model(model_id)
+
+@functools.lru_cache(maxsize=1)
+def _chat_service() -> ChatAgent:
+    from app.features.chat.chat_service.agent_run import ChatAgent
+
+    return ChatAgent(get_bedrock_model(config.CHAT_MODEL_ID), get_database(), get_embedding_model())
+
+_chat_service_instance: Optional[ChatAgent] = None
+_chat_service_lock = asyncio.Lock()
 
-def get_chat_service() -> ChatAgent:
-    """Dependency to get the shared chat service instance"""
-    return chat_service
+async def get_chat_service() -> ChatAgent:
+    """Dependency to get the shared chat service instance, built on first use"""
+    global _chat_service_instance
+    if _chat_service_instance is None:
+        # Building the agent stack (imports, Bedrock clients, database engines) takes a
+        # while, so it runs in a worker thread; the lock makes concurrent first requests
+        # wait for that one build instead of starting their own
+        async with _chat_service_lock:
+            if _chat_service_instance is None:
+                _chat_service_instance = await asyncio.to_thread(_chat_service)
+    return _chat_service_instance
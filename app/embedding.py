@@ -1,11 +1,34 @@
-from typing import List
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import threading
 import boto3
+from botocore.config import Config
 import json
 
 class Embeddings:
-    def __init__(self, region, model_id):
+    def __init__(self, region, model_id, max_pool_connections: int = 25, cache_size: int = 512):
         self.model_id = model_id
-        self.bedrock_client = boto3.client("bedrock-runtime", region_name=region)
+        self.max_pool_connections = max_pool_connections
+
+        # LRU of embeddings keyed by normalized text; repeat queries skip the Bedrock call.
+        # Locked because generate_embeddings_batch calls in from worker threads.
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Embedding requests currently in flight on the event loop, keyed like the cache
+        self._inflight: Dict[str, "asyncio.Future[List[float]]"] = {}
+        # One client per process; the pooled keep-alive connections avoid a TLS handshake per call
+        self.bedrock_client = boto3.client(
+            "bedrock-runtime",
+            region_name=region,
+            config=Config(
+                retries={"max_attempts": 2},
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True,
+            ),
+        )
 
     def generate_embeddings(self, text: str) -> List[float]:
         """
@@ -17,15 +40,75 @@ class Embeddings:
         Returns:
             List of embedding values
         """
+        key = " ".join(text.lower().split())
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
         try:
             response = self.bedrock_client.invoke_model(
                 modelId=self.model_id,
-                body=json.dumps({"inputText": text, "dimensions": 512}),
+                body=json.dumps({"inputText": text, "dimensions": 512, "normalize": True}),
                 accept="application/json",
                 contentType="application/json",
             )
             body = json.loads(response["body"].read())
             embeddings = body['embedding']
-            return embeddings
         except Exception as e:
-            raise
\ No newline at end of file
+            raise
+
+        with self._cache_lock:
+            self._cache[key] = embeddings
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return embeddings
+
+    async def aembed(self, text: str) -> List[float]:
+        """
+        Generate embeddings from async code without blocking the event loop.
+
+        Concurrent requests for the same text (several sessions asking the same
+        question at once) share a single Bedrock call.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List of embedding values
+        """
+        key = " ".join(text.lower().split())
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(asyncio.to_thread(self.generate_embeddings, text))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(pending)
+
+    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts concurrently over the shared client.
+
+        Titan's InvokeModel takes a single input, so the requests are fanned out
+        across the client's connection pool rather than sent one after another.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embeddings, in the same order as texts
+        """
+        if not texts:
+            return []
+        if len(texts) == 1:
+            return [self.generate_embeddings(texts[0])]
+
+        with ThreadPoolExecutor(max_workers=min(len(texts), self.max_pool_connections)) as executor:
+            return list(executor.map(self.generate_embeddings, texts))
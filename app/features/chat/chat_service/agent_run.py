@@ -1,18 +1,18 @@
 from __future__ import annotations as _annotations
 
-import functools
-import json
-from typing import Optional, AsyncGenerator, Dict, Any
+import ast
+import asyncio
+import logging
+import operator
+import re
+from typing import Final, Optional, AsyncGenerator, Dict, Any
 
+import boto3
+from botocore.config import Config
 from pydantic_ai import Agent
-from pydantic_ai.models.bedrock import BedrockConverseModel
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+from pydantic_ai.models.bedrock import BedrockConverseModel, BedrockModelSettings
 from pydantic_ai.providers.bedrock import BedrockProvider
-from pydantic_ai.settings import ModelSettings
-
-import sys
-import os
-# Add parent directory to path to import from root
-# sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import Database
 from app.embedding import Embeddings
@@ -20,116 +20,40 @@ from app.config import config
 
 from .agent_tools import AgentTools
 
+logger = logging.getLogger(__name__)
 
-class ChatAgent:
-    def __init__(self, model_id):
-        
-        # Initialize the Bedrock model with region
-        try:
-            # Create a BedrockProvider with the specific region for Bedrock
-            bedrock_provider = BedrockProvider(region_name=config.BEDROCK_REGION)
-            self.model = BedrockConverseModel(model_id, provider=bedrock_provider)
-        except Exception as e:
-            print(f"Error initializing Bedrock model: {e}")
-            print(f"Make sure AWS credentials are configured and AWS_REGION is set to: {config.AWS_REGION}")
-            raise e
-        
-        # Initialize database and embedding model
-        self.database = Database(config.DB_URL)
-        self.database.create_tables()  # Ensure tables exist
-        self.embedding_model = Embeddings(config.BEDROCK_REGION, config.EMBEDDING_MODEL_ID)
-        
-        # Initialize agent tools with database and embedding access
-        self.tools = AgentTools(self.database, self.embedding_model)
-        
-        # System prompt
-        self.system_prompt = """
-You are a helpful assistant for Zus Coffee, a coffee chain. Your role is to answer customer questions *strictly* based on the tools and product data available to you.
 
-You are responsible for assisting with:
+# System prompts are built once at import time, so every call sends the identical prefix
+_ASSISTANT_SYSTEM_PROMPT: Final[str] = """
+You are a helpful assistant for Zus Coffee, a coffee chain. Answer customer questions *strictly* based on the tools and data available to you:
 - Product information about drinkwares sold by Zus Coffee (e.g. mugs, tumblers)
-- Details about coffee outlet locations and their operational hours
-- Database queries about outlet information using natural language
-
-You **do not** have access to information outside of the available product database and outlet information. If a question falls outside this scope, politely let the user know you cannot help.
-
-When performing *any* numerical calculation (e.g. addition, multiplication), you must *always* call the appropriate tool. Do **not** do math in your head or inline in responses.
+- Outlet locations and details
 
-Use:
-- `multiplication_calculator` for all multiplication (even simple values)
-- `addition_calculator` for all addition
-- `query_outlets_table` for complex queries about outlet data using natural language
+You **do not** have access to any other information. If a question falls outside this scope, politely let the user know you cannot help.
 
-You are not allowed to perform arithmetic yourself. Think step-by-step, and *always* delegate calculations to the appropriate tool.
-
-Use `get_products` and `get_similar_products` to retrieve product information about drinkwares.
-
-Use `get_outlet` to get basic details about outlet branches and their operational hours.
-
-Use `query_outlets_table` for more complex queries about outlet information, such as:
-- Finding outlets by name or address
-- Listing all outlets
-- Searching for outlets in specific locations
-- Any other database queries about outlet data
+Tools:
+- `get_products` and `get_similar_products` to retrieve drinkware information. When a question covers several products or topics, use `get_similar_products_batch` with one query per topic instead of several `get_similar_products` calls.
+- `query_outlets_table` for questions about outlets in natural language (finding outlets by name, address or location, listing outlets)
+- `addition_calculator` for all addition and `multiplication_calculator` for all multiplication, even simple values. Never do arithmetic yourself.
 
 Be clear, concise, and helpful. Always cite the information retrieved via tools when answering customer questions.
 """
-        
-        # Initialize the agent
-        self.agent = Agent(
-            name='zus_coffee_assistant',
-            model=self.model,
-            model_settings=ModelSettings(parallel_tool_calls=True),
-            system_prompt=self.system_prompt,
-            tools=[
-                self.tools.addition_calculator,
-                self.tools.multiplication_calculator,
-                self.tools.get_products,
-                self.tools.get_similar_products,
-                self.tools.query_outlets_table
-            ],
-        )
-        
-        # Create a separate agent for product summarization
-        self.product_summary_agent = Agent(
-            name='product_summary_agent',
-            model=self.model,
-            model_settings=ModelSettings(parallel_tool_calls=True),
-            system_prompt="""
-You are a product information specialist for Zus Coffee. Your role is to help customers find and understand product information about drinkwares sold by Zus Coffee.
 
-IMPORTANT: You must ALWAYS use the `get_similar_products` tool first before providing any product information. You do not have any built-in knowledge about Zus Coffee products.
+_PRODUCT_SUMMARY_SYSTEM_PROMPT: Final[str] = """
+You are a product information specialist for Zus Coffee. Your role is to help customers find and understand information about drinkwares sold by Zus Coffee.
 
-Your workflow:
-1. FIRST: Always call `get_similar_products` with the user's query to search for relevant products
-2. THEN: Analyze the results from the tool call
-3. FINALLY: Provide a helpful summary based on the retrieved product data
+You have no built-in knowledge about Zus Coffee products. ALWAYS call `get_similar_products` with the user's query before answering. When the user asks about several products or topics at once, call `get_similar_products_batch` once with one search query per topic instead.
 
-Your responsibilities:
-- Use the `get_similar_products` tool to search for relevant products based on user queries
-- Analyze and summarize product information from the search results
-- Create clear, informative summaries that highlight key features
-- Focus on relevant details like product names, prices, descriptions, materials, and specifications
-- Present information in a customer-friendly manner
-- Be concise but comprehensive in your summaries
+Then summarize the retrieved products for the customer:
+- Highlight relevant details like product names, prices, descriptions, materials, and specifications
+- Be clear, concise and customer-friendly
 
-NEVER say you don't have information about products. Instead, ALWAYS use the `get_similar_products` tool first to search for relevant products, then provide a summary based on what the tool returns.
+Only say no relevant products were found if the tool returns no results.
 
-If the tool returns no results, then you can say no relevant products were found for the query.
+Focus on answering the user's specific question about Zus Coffee drinkware products.
+"""
 
-Be helpful and informative, focusing on answering the user's specific question about Zus Coffee drinkware products.
-""",
-            tools=[
-                self.tools.get_similar_products,
-            ],
-        )
-        
-        # Create a separate agent for outlet queries
-        self.outlet_query_agent = Agent(
-            name='outlet_query_agent',
-            model=self.model,
-            model_settings=ModelSettings(parallel_tool_calls=True),
-            system_prompt="""
+_OUTLET_QUERY_SYSTEM_PROMPT: Final[str] = """
 You are an outlet information specialist for Zus Coffee. Your role is to help customers find information about Zus Coffee outlet locations and details by translating their natural language queries into SQL and executing them.
 
 Database Schema:
@@ -159,11 +83,162 @@ Examples of SQL translations:
 Always use the `execute_outlets_query` tool with your generated SQL query, then format the results nicely for the customer.
 
 Be helpful and informative, focusing on answering the user's specific question about Zus Coffee outlet locations.
-""",
+"""
+
+_RESPONSE_MERGE_SYSTEM_PROMPT: Final[str] = """
+You are a helpful assistant for Zus Coffee. You will be given a customer's question together with an answer about Zus Coffee products and an answer about Zus Coffee outlets.
+Combine them into a single concise, customer-friendly reply. Use only the information in the given answers and leave out anything that is not relevant to the question.
+"""
+
+# Messages that are nothing but an arithmetic expression are evaluated locally
+# instead of costing a tool-call round trip through the model
+_ARITHMETIC_RE = re.compile(r"^[\d+\-*/().\s]+$")
+# Phrasing around the expression in questions like "what is 12 * 7?"
+_ARITHMETIC_PREFIX_RE = re.compile(r"^(?:what(?:'?s|\s+is)|calculate|compute)\s+", re.IGNORECASE)
+_ARITHMETIC_SUFFIX_RE = re.compile(r"[\s?=]+$")
+# "2024-10-15" and "15/10/2024" are dates, not sums; phone numbers look the same
+_DATE_OR_PHONE_RE = re.compile(r"\d+[-/]\d+[-/]\d+")
+# Without a spaced operator, "*", "+" or a bracket, "a-b" and "a/b" are more likely ranges or dates
+_ARITHMETIC_OPERATOR_RE = re.compile(r"\s[-+*/]\s|[*+()]")
+_ARITHMETIC_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _eval_arithmetic_node(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC_OPS:
+        return _ARITHMETIC_OPS[type(node.op)](_eval_arithmetic_node(node.left), _eval_arithmetic_node(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _ARITHMETIC_OPS:
+        return _ARITHMETIC_OPS[type(node.op)](_eval_arithmetic_node(node.operand))
+    raise ValueError("unsupported expression")
+
+
+def evaluate_arithmetic(message: str) -> Optional[str]:
+    """Return "<expression> = <result>" if message is a plain arithmetic expression, else None."""
+    expression = _ARITHMETIC_SUFFIX_RE.sub("", _ARITHMETIC_PREFIX_RE.sub("", message.strip()))
+    if len(expression) > 200 or not _ARITHMETIC_RE.match(expression):
+        return None
+    if _DATE_OR_PHONE_RE.search(expression) or not _ARITHMETIC_OPERATOR_RE.search(expression):
+        return None
+    try:
+        tree = ast.parse(expression, mode="eval").body
+        if not isinstance(tree, ast.BinOp):
+            return None
+        value = _eval_arithmetic_node(tree)
+    except (SyntaxError, ValueError, ZeroDivisionError):
+        return None
+    if isinstance(value, float):
+        value = int(value) if value.is_integer() else round(value, 10)
+    return f"{expression} = {value}"
+
+
+_MODEL_SETTINGS = BedrockModelSettings(
+    parallel_tool_calls=True,
+    # "optimized" routes Converse calls to Bedrock's latency-optimized inference where the model supports it
+    bedrock_performance_configuration={"latency": config.BEDROCK_LATENCY},
+)
+
+
+class PromptCachingBedrockModel(BedrockConverseModel):
+    """BedrockConverseModel that ends the system prompt with a Bedrock prompt-cache checkpoint,
+    so the static prefix is read from cache instead of being reprocessed on every turn."""
+
+    async def _map_messages(self, messages):
+        system_prompt, bedrock_messages = await super()._map_messages(messages)
+        if system_prompt:
+            system_prompt.append({"cachePoint": {"type": "default"}})
+        return system_prompt, bedrock_messages
+
+
+def build_bedrock_model(model_id: str) -> BedrockConverseModel:
+    """Create the Bedrock chat model for model_id in the Bedrock region."""
+    try:
+        # One pooled keep-alive client per model, so turns after the first reuse open
+        # connections instead of paying TCP + TLS setup; timeouts match pydantic-ai's defaults
+        bedrock_client = boto3.client(
+            "bedrock-runtime",
+            region_name=config.BEDROCK_REGION,
+            config=Config(
+                retries={"max_attempts": 3, "mode": "adaptive"},
+                max_pool_connections=50,
+                tcp_keepalive=True,
+                read_timeout=300,
+                connect_timeout=60,
+            ),
+        )
+        bedrock_provider = BedrockProvider(bedrock_client=bedrock_client)
+        model_class = PromptCachingBedrockModel if config.BEDROCK_PROMPT_CACHING else BedrockConverseModel
+        return model_class(model_id, provider=bedrock_provider)
+    except Exception as e:
+        logger.error("Error initializing Bedrock model: %s", e)
+        logger.error("Make sure AWS credentials are configured and AWS_REGION is set to: %s", config.AWS_REGION)
+        raise e
+
+
+class ChatAgent:
+    def __init__(self, model: BedrockConverseModel, database: Database, embedding_model: Embeddings):
+        
+        # Shared Bedrock model, database and embedding model (one client / connection pool per process)
+        self.model = model
+        self.database = database
+        self.embedding_model = embedding_model
+        
+        # Initialize agent tools with database, embedding and model access
+        self.tools = AgentTools(self.database, self.embedding_model, self.model)
+        
+        # Initialize the agent
+        self.agent = Agent(
+            name='zus_coffee_assistant',
+            model=self.model,
+            model_settings=_MODEL_SETTINGS,
+            system_prompt=_ASSISTANT_SYSTEM_PROMPT,
+            tools=[
+                self.tools.addition_calculator,
+                self.tools.multiplication_calculator,
+                self.tools.get_products,
+                self.tools.get_similar_products,
+                self.tools.get_similar_products_batch,
+                self.tools.query_outlets_table
+            ],
+        )
+        
+        # Create a separate agent for product summarization
+        self.product_summary_agent = Agent(
+            name='product_summary_agent',
+            model=self.model,
+            model_settings=_MODEL_SETTINGS,
+            system_prompt=_PRODUCT_SUMMARY_SYSTEM_PROMPT,
+            tools=[
+                self.tools.get_similar_products,
+                self.tools.get_similar_products_batch,
+            ],
+        )
+        
+        # Create a separate agent for outlet queries
+        self.outlet_query_agent = Agent(
+            name='outlet_query_agent',
+            model=self.model,
+            model_settings=_MODEL_SETTINGS,
+            system_prompt=_OUTLET_QUERY_SYSTEM_PROMPT,
             tools=[
                 self.tools.execute_outlets_query,
             ],
         )
+        
+        # Tool-less agent that merges the specialist answers for combined_chat
+        self.response_merge_agent = Agent(
+            name='response_merge_agent',
+            model=self.model,
+            model_settings=_MODEL_SETTINGS,
+            system_prompt=_RESPONSE_MERGE_SYSTEM_PROMPT,
+        )
     
     async def chat(self, message: str, message_history: Optional[list] = None) -> tuple[str, list, list]:
         """
@@ -177,8 +252,13 @@ Be helpful and informative, focusing on answering the user's specific question a
             tuple: (response_text, updated_message_history, tool_calls_metadata)
         """
         try:
-            # Clear any previous tool metadata
-            self.tools.tool_calls_metadata.clear()
+            # Fresh tool metadata for this request
+            self.tools.reset_tool_metadata()
+            
+            # Plain arithmetic is answered without a model round trip
+            response = evaluate_arithmetic(message)
+            if response is not None:
+                return response, self._append_exchange(message_history, message, response), []
             
             # Run the agent with message history
             result = await self.agent.run(
@@ -189,11 +269,11 @@ Be helpful and informative, focusing on answering the user's specific question a
             # Get tool metadata
             tool_metadata = self.tools.get_and_clear_tool_metadata()
             
-            # Return response, updated message history, and tool metadata
-            return str(result.data), result.all_messages(), tool_metadata
+            # The agents output plain str; all_messages() is the run's own list, not a copy
+            return result.data, result.all_messages(), tool_metadata
             
         except Exception as e:
-            print(f"Error in chat service: {e}")
+            logger.error("Error in chat service: %s", e)
             raise Exception(f"Sorry, I encountered an error while processing your request: {str(e)}")
         
 
@@ -209,8 +289,8 @@ Be helpful and informative, focusing on answering the user's specific question a
             tuple: (response_text, updated_message_history, tool_calls_metadata)
         """
         try:
-            # Clear any previous tool metadata
-            self.tools.tool_calls_metadata.clear()
+            # Fresh tool metadata for this request
+            self.tools.reset_tool_metadata()
             
             # Run the product summary agent with message history
             result = await self.product_summary_agent.run(
@@ -221,11 +301,11 @@ Be helpful and informative, focusing on answering the user's specific question a
             # Get tool metadata
             tool_metadata = self.tools.get_and_clear_tool_metadata()
             
-            # Return response, updated message history, and tool metadata
-            return str(result.data), result.all_messages(), tool_metadata
+            # The agents output plain str; all_messages() is the run's own list, not a copy
+            return result.data, result.all_messages(), tool_metadata
             
         except Exception as e:
-            print(f"Error in product chat service: {e}")
+            logger.error("Error in product chat service: %s", e)
             raise Exception(f"Sorry, I encountered an error while processing your product request: {str(e)}")
 
     async def outlet_chat(self, message: str, message_history: Optional[list] = None) -> tuple[str, list, list]:
@@ -240,8 +320,13 @@ Be helpful and informative, focusing on answering the user's specific question a
             tuple: (response_text, updated_message_history, tool_calls_metadata)
         """
         try:
-            # Clear any previous tool metadata
-            self.tools.tool_calls_metadata.clear()
+            # Fresh tool metadata for this request
+            self.tools.reset_tool_metadata()
+            
+            # Common questions are answered from a SQL template without an LLM round trip
+            response = await self.tools.query_outlets_by_template(message)
+            if response is not None:
+                return response, self._append_exchange(message_history, message, response), self.tools.get_and_clear_tool_metadata()
             
             # Run the outlet query agent with message history
             result = await self.outlet_query_agent.run(
@@ -252,9 +337,134 @@ Be helpful and informative, focusing on answering the user's specific question a
             # Get tool metadata
             tool_metadata = self.tools.get_and_clear_tool_metadata()
             
-            # Return response, updated message history, and tool metadata
-            return str(result.data), result.all_messages(), tool_metadata
+            # The agents output plain str; all_messages() is the run's own list, not a copy
+            return result.data, result.all_messages(), tool_metadata
+            
+        except Exception as e:
+            logger.error("Error in outlet chat service: %s", e)
+            raise Exception(f"Sorry, I encountered an error while processing your outlet request: {str(e)}")
+
+    async def combined_chat(self, message: str, message_history: Optional[list] = None) -> tuple[str, list, list]:
+        """
+        Answer a message that needs both product and outlet information. The product and
+        outlet agents run concurrently and their answers are merged into one reply.
+        
+        Args:
+            message: User's message
+            message_history: Optional conversation history from previous messages
+            
+        Returns:
+            tuple: (response_text, updated_message_history, tool_calls_metadata)
+        """
+        try:
+            # Fresh tool metadata for this request
+            self.tools.reset_tool_metadata()
+            
+            # Wall time is max(product, outlet) rather than their sum
+            product_result, outlet_result = await asyncio.gather(
+                self.product_summary_agent.run(message),
+                self.outlet_query_agent.run(message),
+            )
+            
+            merge_prompt = (
+                f"Customer question: {message}\n\n"
+                f"Product answer:\n{product_result.data}\n\n"
+                f"Outlet answer:\n{outlet_result.data}"
+            )
+            result = await self.response_merge_agent.run(
+                merge_prompt,
+                message_history=message_history,
+            )
+            
+            # Get tool metadata from both specialist runs
+            tool_metadata = self.tools.get_and_clear_tool_metadata()
+            
+            return result.data, result.all_messages(), tool_metadata
+            
+        except Exception as e:
+            logger.error("Error in combined chat service: %s", e)
+            raise Exception(f"Sorry, I encountered an error while processing your request: {str(e)}")
+
+    @staticmethod
+    def _append_exchange(message_history: Optional[list], message: str, response: str) -> list:
+        """Message history extended with a user message and a reply produced without the model"""
+        return list(message_history or []) + [
+            ModelRequest(parts=[UserPromptPart(content=message)]),
+            ModelResponse(parts=[TextPart(content=response)]),
+        ]
+
+    async def _run_stream(self, agent: Agent, message: str, message_history: Optional[list]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream an agent run as text deltas.
+        
+        Yields {"chunk": text} items while the model generates, followed by one final
+        {"response": full_text, "message_history": ..., "tool_calls": ...} item.
+        """
+        # Fresh tool metadata for this request
+        self.tools.reset_tool_metadata()
+        
+        async with agent.run_stream(message, message_history=message_history) as result:
+            parts = []
+            async for chunk in result.stream_text(delta=True):
+                parts.append(chunk)
+                yield {"chunk": chunk}
+            
+            yield {
+                "response": "".join(parts),
+                "message_history": result.all_messages(),
+                "tool_calls": self.tools.get_and_clear_tool_metadata(),
+            }
+
+    async def chat_stream(self, message: str, message_history: Optional[list] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Streaming variant of `chat`. See `_run_stream` for the items yielded.
+        """
+        try:
+            response = evaluate_arithmetic(message)
+            if response is not None:
+                yield {"chunk": response}
+                yield {
+                    "response": response,
+                    "message_history": self._append_exchange(message_history, message, response),
+                    "tool_calls": [],
+                }
+                return
+            
+            async for item in self._run_stream(self.agent, message, message_history):
+                yield item
+        except Exception as e:
+            logger.error("Error in chat stream service: %s", e)
+            raise Exception(f"Sorry, I encountered an error while processing your request: {str(e)}")
+
+    async def product_chat_stream(self, message: str, message_history: Optional[list] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Streaming variant of `product_chat`. See `_run_stream` for the items yielded.
+        """
+        try:
+            async for item in self._run_stream(self.product_summary_agent, message, message_history):
+                yield item
+        except Exception as e:
+            logger.error("Error in product chat stream service: %s", e)
+            raise Exception(f"Sorry, I encountered an error while processing your product request: {str(e)}")
+
+    async def outlet_chat_stream(self, message: str, message_history: Optional[list] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Streaming variant of `outlet_chat`. See `_run_stream` for the items yielded.
+        """
+        try:
+            self.tools.reset_tool_metadata()
+            response = await self.tools.query_outlets_by_template(message)
+            if response is not None:
+                yield {"chunk": response}
+                yield {
+                    "response": response,
+                    "message_history": self._append_exchange(message_history, message, response),
+                    "tool_calls": self.tools.get_and_clear_tool_metadata(),
+                }
+                return
             
+            async for item in self._run_stream(self.outlet_query_agent, message, message_history):
+                yield item
         except Exception as e:
-            print(f"Error in outlet chat service: {e}")
+            logger.error("Error in outlet chat stream service: %s", e)
             raise Exception(f"Sorry, I encountered an error while processing your outlet request: {str(e)}")
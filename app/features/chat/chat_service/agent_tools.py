@@ -1,20 +1,44 @@
 import functools
-from typing import List, Dict, Any
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 import asyncio
-import json
+import logging
+import re
+import time
 
-import sys
-import os
-# Add parent directory to path to import from root
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import orjson
+import sqlglot
+from sqlglot import exp
 
 from app.database import Database
 from app.embedding import Embeddings
 from pydantic_ai import Agent
 from pydantic_ai.models.bedrock import BedrockConverseModel
-from pydantic_ai.providers.bedrock import BedrockProvider
 from app.config import config
 
+from .semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCall(NamedTuple):
+    """Metadata about one tool call; validates straight into ToolMetadata"""
+    tool_name: str
+    tool_kwargs: Dict[str, Any]
+    tool_args: tuple
+    result: Any
+    generated_sql: Optional[str] = None
+    cache_hit: Optional[bool] = None
+
+# Tool call metadata for the current request. Each chat turn sets a fresh list; the
+# tasks and worker threads pydantic-ai runs tools in inherit it, so concurrent requests
+# sharing one AgentTools instance never see each other's calls.
+tool_calls_metadata: ContextVar[Optional[List[ToolCall]]] = ContextVar("tool_calls_metadata", default=None)
+
+# Whether the running tool call was served from a cache; set by the tool, read by log_tool_call
+_tool_cache_hit: ContextVar[Optional[bool]] = ContextVar("tool_cache_hit", default=None)
+
 
 # Text-to-SQL agent configuration
 text_to_sql_prompt = """
@@ -30,25 +54,14 @@ name (String, max 255 chars): The name of the outlet.
 
 address (String, max 500 chars): The physical address of the outlet.
 
-Safety Rules — Must Follow:
-Only generate SELECT queries.
-Do not generate any queries that modify data, such as INSERT, UPDATE, DELETE, DROP, ALTER, TRUNCATE, or CREATE.
-
-No nested queries that modify the database, even within WITH clauses or subqueries.
+Rules:
+Only generate a single read-only SELECT query (generated SQL is parsed and anything else is rejected).
 
-Never use functions that write logs or perform server-side actions (e.g., pg_sleep, pg_notify, xp_cmdshell, etc.).
+Only reference the table and columns in the schema; do not use JOINs.
 
-Do not use JOINs unless additional tables are added explicitly in the schema.
+Treat user queries as case-insensitive (use ILIKE) unless specified.
 
-Only reference columns that exist in the schema.
-
-Do not hallucinate tables or columns. Stick exactly to what is provided.
-
-All user queries should be assumed to be case-insensitive unless specified.
-
-If a user query is ambiguous, make a reasonable assumption and generate the most likely intended read-only query. Prefer clarity and specificity.
-
-Do not add comments or explanations unless explicitly requested.
+If a user query is ambiguous, make a reasonable assumption and generate the most likely intended query.
 
 Output Format:
 Always return only the raw SQL query.
@@ -76,31 +89,121 @@ SQL: -- Cannot generate a safe query for this request.
 """
 
 
+# Common outlet questions answered from a fixed SQL template, skipping the LLM text-to-SQL
+# round trip. Each pattern's "location" group (if any) is bound as an ILIKE parameter.
+_OUTLET_NOUN = r"(?:zus\s+)?(?:outlets?|stores?|branch(?:es)?|shops?|cafes?)"
+_OUTLET_QUERY_TEMPLATES: List[Tuple[re.Pattern, str]] = [
+    (
+        re.compile(rf"^(?:please\s+)?(?:list|show|get|give)(?:\s+me)?\s+all(?:\s+the)?(?:\s+zus)?\s+{_OUTLET_NOUN}[\s?.!]*$", re.IGNORECASE),
+        "SELECT name, address FROM outlet ORDER BY name",
+    ),
+    (
+        re.compile(rf"^(?:(?:please\s+)?(?:find|show|list|get|any)(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+)?{_OUTLET_NOUN}\s+(?:in|near|at|around)\s+(?P<location>[\w\s.,'-]+?)[\s?.!]*$", re.IGNORECASE),
+        "SELECT name, address FROM outlet WHERE address ILIKE :location OR name ILIKE :location ORDER BY name",
+    ),
+]
+
+# "Outlets near me" names no place; such questions go to the agent instead of an ILIKE on "me"
+_DEICTIC_LOCATION_RE = re.compile(
+    r"^(?:me|us|you|here|there|nearby|this\s+area|where\s+i\s+am|(?:my|our|your)\b.*)$", re.IGNORECASE
+)
+
+# Words that phrase an outlet question without narrowing it. Whatever else a question says
+# (place names, times, services) must match word for word before a semantic cache hit is used
+_OUTLET_QUERY_FILLER_WORDS = frozenset({
+    "a", "an", "the", "all", "any", "please", "can", "could", "you", "i", "me", "show", "list",
+    "find", "get", "give", "tell", "see", "what", "which", "where", "are", "is", "there", "do",
+    "does", "have", "has", "of", "in", "at", "near", "around", "zus", "coffee", "outlet",
+    "outlets", "store", "stores", "shop", "shops", "branch", "branches", "location", "locations",
+})
+
+
+def _outlet_query_terms(nl_query: str) -> frozenset:
+    return frozenset(re.findall(r"[a-z0-9]+", nl_query.lower())) - _OUTLET_QUERY_FILLER_WORDS
+
+
+# Server-side functions generated SQL must never call
+_FORBIDDEN_SQL_FUNCTIONS = {
+    "pg_sleep", "pg_notify", "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf",
+    "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "lo_import", "lo_export",
+    "dblink", "dblink_exec", "set_config",
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _check_read_only_sql(sql_query: str) -> Optional[str]:
+    """
+    Parse SQL and return an error message unless it is a single read-only SELECT
+    (or UNION/INTERSECT/EXCEPT of SELECTs), else None. Cached by query text since the
+    model tends to emit the same SQL for the same questions.
+    """
+    try:
+        statements = [statement for statement in sqlglot.parse(sql_query, read="postgres") if statement is not None]
+    except sqlglot.errors.ParseError:
+        return "Error: Could not parse the SQL query."
+    
+    if len(statements) != 1:
+        return "Error: Only a single SELECT query is allowed."
+    tree = statements[0]
+    if not isinstance(tree, (exp.Select, exp.SetOperation)):
+        return "Error: Only SELECT queries are allowed."
+    
+    # Data-modifying CTEs, SELECT ... INTO and row locks are not read-only either
+    if tree.find(exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Drop, exp.Alter, exp.Create,
+                 exp.TruncateTable, exp.Copy, exp.Command, exp.Into, exp.Lock):
+        return "Error: Only read-only SELECT queries are allowed."
+    for function in tree.find_all(exp.Anonymous):
+        if function.name.lower() in _FORBIDDEN_SQL_FUNCTIONS:
+            return f"Error: {function.name} is not allowed."
+    return None
+
+
+def _rows_to_json(rows) -> str:
+    """Serialize result rows as compact JSON for the model (no indentation to spend tokens on)"""
+    return orjson.dumps([row._asdict() for row in rows], default=str).decode()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _truncate(value: Any, limit: int) -> str:
+    """repr() of value cut to limit characters, for logging large tool results"""
+    text = repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text)} chars)"
+
+
+def _record_tool_call(tool_metadata: ToolCall) -> None:
+    """Append metadata about a tool call to the current request's list"""
+    bucket = tool_calls_metadata.get()
+    if bucket is None:
+        bucket = []
+        tool_calls_metadata.set(bucket)
+    bucket.append(tool_metadata)
+
+
 def log_tool_call(func):
     """Decorator to log tool calls for debugging and collect metadata"""
     if asyncio.iscoroutinefunction(func):
         @functools.wraps(func)
         async def async_wrapper(self, *args, **kwargs):
             tool_name = func.__name__
-            print(f"Tool called: {tool_name}")
-            print(f"Args: {args}")
-            print(f"Kwargs: {kwargs}")
+            # %-style arguments are only formatted when DEBUG is enabled
+            logger.debug("Tool called: %s args=%r kwargs=%r", tool_name, args, kwargs)
             
-            result = await func(self, *args, **kwargs)
-            print(f"Result: {result}")
+            cache_hit_token = _tool_cache_hit.set(None)
+            try:
+                result = await func(self, *args, **kwargs)
+                cache_hit = _tool_cache_hit.get()
+            finally:
+                _tool_cache_hit.reset(cache_hit_token)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tool %s result: %s", tool_name, _truncate(result, 200))
             
             # Collect metadata about this tool call
-            tool_metadata = {
-                "tool_name": tool_name,
-                "tool_kwargs": kwargs,
-                "tool_args": args,
-                "result": result
-            }
-            
-            # Store metadata in the instance
-            if not hasattr(self, 'tool_calls_metadata'):
-                self.tool_calls_metadata = []
-            self.tool_calls_metadata.append(tool_metadata)
+            _record_tool_call(ToolCall(tool_name, kwargs, args, result, cache_hit=cache_hit))
             
             return result
         return async_wrapper
@@ -108,25 +211,20 @@ def log_tool_call(func):
         @functools.wraps(func)
         def wrapper(self, *args, **kwargs):
             tool_name = func.__name__
-            print(f"Tool called: {tool_name}")
-            print(f"Args: {args}")
-            print(f"Kwargs: {kwargs}")
+            # %-style arguments are only formatted when DEBUG is enabled
+            logger.debug("Tool called: %s args=%r kwargs=%r", tool_name, args, kwargs)
             
-            result = func(self, *args, **kwargs)
-            print(f"Result: {result}")
+            cache_hit_token = _tool_cache_hit.set(None)
+            try:
+                result = func(self, *args, **kwargs)
+                cache_hit = _tool_cache_hit.get()
+            finally:
+                _tool_cache_hit.reset(cache_hit_token)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tool %s result: %s", tool_name, _truncate(result, 200))
             
             # Collect metadata about this tool call
-            tool_metadata = {
-                "tool_name": tool_name,
-                "tool_kwargs": kwargs,
-                "tool_args": args,
-                "result": result
-            }
-            
-            # Store metadata in the instance
-            if not hasattr(self, 'tool_calls_metadata'):
-                self.tool_calls_metadata = []
-            self.tool_calls_metadata.append(tool_metadata)
+            _record_tool_call(ToolCall(tool_name, kwargs, args, result, cache_hit=cache_hit))
             
             return result
         return wrapper
@@ -135,83 +233,260 @@ def log_tool_call(func):
 class AgentTools:
     """Class containing all agent tools with access to database and embedding model"""
     
-    def __init__(self, database: Database, embedding_model: Embeddings):
+    def __init__(self, database: Database, embedding_model: Embeddings, model: BedrockConverseModel):
         self.database = database
         self.embedding_model = embedding_model
-        self.tool_calls_metadata = []  # Store metadata about tool calls
         
-        # Initialize the text-to-SQL agent
-        bedrock_provider = BedrockProvider(region_name=config.BEDROCK_REGION)
-
-        self.model = BedrockConverseModel(config.CHAT_MODEL_ID, provider=bedrock_provider)
+        # The catalog changes rarely, so the full product listing is served from memory for a short TTL.
+        # The TTL bounds staleness after ingestion runs in another process; changes made through
+        # this Database bump its products_version, which drops the product caches at once.
+        self.products_cache_ttl = 300
+        self._products_cache: Optional[Tuple[float, list]] = None
+        self._products_version = database.products_version
+        
+        # LRU of similarity search results keyed by normalized query text, so repeated
+        # searches skip both the Bedrock embedding call and the vector query.
+        # Entries are (cached_at, results) and expire after products_cache_ttl.
+        self.similar_products_cache_size = 512
+        self._similar_products_cache: "OrderedDict[str, Tuple[float, list]]" = OrderedDict()
+        
+        # Row cap for model-generated outlet SQL; the model can't use thousands of rows anyway
+        self.outlet_query_max_rows = 100
+        
+        # LRU of text-to-SQL output keyed by normalized question
+        self.sql_cache_size = 1024
+        self._sql_cache: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Semantic cache of near-duplicate outlet questions that the exact-match key misses.
+        # Product searches have none: a lookup needs the query embedding, so a hit would only
+        # save the vector search, and "black tumbler" / "white tumbler" embed too closely.
+        self._outlet_query_semantic_cache = SemanticCache(threshold=config.SEMANTIC_CACHE_THRESHOLD)
+        
+        # Initialize the text-to-SQL agent on the shared chat model
+        self.model = model
         self.text_to_sql_agent = Agent(
             name='text_to_sql_agent',
             model=self.model,
             system_prompt=text_to_sql_prompt
         )
     
-    def get_and_clear_tool_metadata(self) -> List[Dict[str, Any]]:
-        """Get all tool call metadata and clear the list"""
-        metadata = self.tool_calls_metadata.copy()
-        self.tool_calls_metadata.clear()
+    async def warm_up(self) -> None:
+        """Open the Bedrock embedding connection with one small request, ahead of the first query"""
+        await asyncio.to_thread(self.embedding_model.generate_embeddings, "warmup")
+    
+    def reset_tool_metadata(self) -> None:
+        """Start a fresh tool call metadata list for the current request"""
+        tool_calls_metadata.set([])
+    
+    def get_and_clear_tool_metadata(self) -> List[ToolCall]:
+        """Get the current request's tool call metadata and clear it"""
+        metadata = tool_calls_metadata.get() or []
+        tool_calls_metadata.set(None)
         return metadata
     
     @log_tool_call
-    def get_products(self):
+    async def get_products(self):
         """Gets information about products"""
-        return self.database.get_all_products()
+        self._drop_stale_product_caches()
+        now = time.monotonic()
+        if self._products_cache is not None and now - self._products_cache[0] < self.products_cache_ttl:
+            return self._products_cache[1]
+        
+        products = await self.database.get_all_products()
+        self._products_cache = (now, products)
+        return products
+
+    def _drop_stale_product_caches(self):
+        """Forget cached product results once the database reports a catalog change"""
+        version = self.database.products_version
+        if version != self._products_version:
+            self._products_version = version
+            self._products_cache = None
+            self._similar_products_cache.clear()
+
+    def _get_cached_similar_products(self, key: str) -> Optional[list]:
+        self._drop_stale_product_caches()
+        cached = self._similar_products_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= self.products_cache_ttl:
+            del self._similar_products_cache[key]
+            return None
+        self._similar_products_cache.move_to_end(key)
+        return cached[1]
+    
+    def _cache_similar_products(self, key: str, results: list):
+        self._similar_products_cache[key] = (time.monotonic(), results)
+        if len(self._similar_products_cache) > self.similar_products_cache_size:
+            self._similar_products_cache.popitem(last=False)
+
+    def _format_outlet_rows(self, rows) -> str:
+        # Callers fetch one row past the cap, so a result of exactly the cap isn't reported as cut short
+        max_rows = self.outlet_query_max_rows
+        result = _rows_to_json(rows[:max_rows])
+        if len(rows) > max_rows:
+            result += f"\n(Only the first {max_rows} rows are shown.)"
+        return result
+
+    def _get_cached_sql(self, key: str) -> Optional[str]:
+        cached = self._sql_cache.get(key)
+        if cached is not None:
+            self._sql_cache.move_to_end(key)
+        return cached
+    
+    def _cache_sql(self, key: str, sql_query: str):
+        self._sql_cache[key] = sql_query
+        if len(self._sql_cache) > self.sql_cache_size:
+            self._sql_cache.popitem(last=False)
+
+    async def _search_similar_products(self, query_embeddings: list) -> list:
+        """One result list per embedding, from the in-memory matrix when loaded, else pgvector"""
+        if self.database.has_embedding_matrix:
+            return [self.database.search_similar_products_numpy(embedding, threshold=0.3) for embedding in query_embeddings]
+        if len(query_embeddings) == 1:
+            return [await self.database.search_similar_products(query_embeddings[0], threshold=0.3)]
+        return await self.database.search_similar_products_batch(query_embeddings, threshold=0.3)
 
     @log_tool_call
-    def get_similar_products(self, search_query: str):
+    async def get_similar_products(self, search_query: str):
         """Performs a semantic similarity search over Zus Coffee's drinkware catalog"""
-        query_embedding = self.embedding_model.generate_embeddings(search_query)
-        return self.database.search_similar_products(query_embedding, threshold=0.3)
+        key = " ".join(search_query.lower().split())
+        cached = self._get_cached_similar_products(key)
+        if cached is not None:
+            _tool_cache_hit.set(True)
+            return cached
+        
+        query_embedding = await self.embedding_model.aembed(search_query)
+        results = (await self._search_similar_products([query_embedding]))[0]
+        
+        _tool_cache_hit.set(False)
+        self._cache_similar_products(key, results)
+        return results
+
+    @log_tool_call
+    async def get_similar_products_batch(self, search_queries: list[str]):
+        """Performs semantic similarity searches for several queries at once over Zus Coffee's drinkware catalog. Returns results per query."""
+        keys = [" ".join(query.lower().split()) for query in search_queries]
+        results = {query: self._get_cached_similar_products(key) for query, key in zip(search_queries, keys)}
+        
+        misses = [(query, key) for query, key in zip(search_queries, keys) if results[query] is None]
+        if misses:
+            # One embedding fan-out and one database round trip for all uncached queries
+            embeddings = await asyncio.to_thread(
+                self.embedding_model.generate_embeddings_batch, [query for query, _ in misses]
+            )
+            searched = await self._search_similar_products(embeddings)
+            for (query, key), query_results in zip(misses, searched):
+                results[query] = query_results
+                self._cache_similar_products(key, query_results)
+        
+        _tool_cache_hit.set(not misses)
+        return results
 
+    # The calculators are async only so pydantic-ai runs them inline on the event loop;
+    # sync tools are dispatched to a worker thread, which costs more than the arithmetic.
+    # Integer inputs give exact integer results, as before.
     @log_tool_call
-    def addition_calculator(self, numbers: list[int]):
+    async def addition_calculator(self, numbers: list[int]):
         """Sums up numbers"""
         return sum(numbers)
 
     @log_tool_call
-    def multiplication_calculator(self, num: int, multiplier: int):
+    async def multiplication_calculator(self, num: int, multiplier: int):
         """Multiplies numbers"""
         return num * multiplier
 
     @log_tool_call
-    def execute_outlets_query(self, sql_query: str):
+    async def execute_outlets_query(self, sql_query: str):
         """Executes a SQL query directly on the outlets database"""
         try:
             # Validate that it's a safe SELECT query
             sql_query_clean = sql_query.strip()
-            if not sql_query_clean.upper().startswith('SELECT'):
-                return "Error: Only SELECT queries are allowed."
-            
-            # Check for dangerous keywords
-            dangerous_keywords = ['INSERT', 'UPDATE', 'DELETE', 'DROP', 'ALTER', 'TRUNCATE', 'CREATE']
-            sql_upper = sql_query_clean.upper()
-            for keyword in dangerous_keywords:
-                if keyword in sql_upper:
-                    return f"Error: {keyword} operations are not allowed."
+            error = _check_read_only_sql(sql_query_clean)
+            if error:
+                return error
             
             # Execute the query on the database
-            rows = self.database.execute_query(sql_query_clean)
+            rows = await self.database.execute_query(sql_query_clean, max_rows=self.outlet_query_max_rows + 1)
             
             # Convert results to JSON format
-            query_result = json.dumps([dict(row._mapping) for row in rows], indent=2)
+            query_result = self._format_outlet_rows(rows)
             return query_result
             
         except Exception as e:
             error_msg = f"Error executing query: {str(e)}"
-            print(f"Error in execute_outlets_query: {e}")
+            logger.error("Error in execute_outlets_query: %s", e)
             return error_msg
 
+    async def query_outlets_by_template(self, nl_query: str) -> Optional[str]:
+        """
+        Answer a common outlet question from a fixed SQL template.
+        
+        Returns a formatted answer, or None when no template matches or the template
+        finds no outlets, in which case the caller should fall back to the LLM.
+        """
+        query = nl_query.strip()
+        for pattern, sql_query in _OUTLET_QUERY_TEMPLATES:
+            match = pattern.match(query)
+            if match:
+                break
+        else:
+            return None
+        
+        location = match.groupdict().get("location")
+        if location:
+            location = " ".join(location.split())
+            if _DEICTIC_LOCATION_RE.match(location):
+                return None
+        params = {"location": f"%{_escape_like(location)}%"} if location else None
+        
+        # One row past the cap tells whether the list was cut short
+        max_rows = self.outlet_query_max_rows
+        rows = await self.database.execute_query(sql_query, params, max_rows=max_rows + 1)
+        if not rows:
+            return None
+        truncated = len(rows) > max_rows
+        rows = rows[:max_rows]
+        
+        where = f" matching '{location}'" if location else ""
+        if truncated:
+            header = f"Here are the first {max_rows} Zus Coffee outlets{where}:"
+        else:
+            header = f"I found {len(rows)} Zus Coffee outlet{'s' if len(rows) != 1 else ''}{where}:"
+        lines = [header]
+        lines += [f"- {row.name}: {row.address}" for row in rows]
+        answer = "\n".join(lines)
+        
+        _record_tool_call(ToolCall(
+            "query_outlets_by_template", {"nl_query": nl_query}, (),
+            [dict(row._mapping) for row in rows], generated_sql=sql_query
+        ))
+        return answer
+
     async def query_outlets_table(self, nl_query: str):
         """Takes Natural Language and performs SQL on a database to query outlet information"""
         try:
-            # Generate SQL query using the text-to-SQL agent
-            result = await self.text_to_sql_agent.run(nl_query)
-            sql_query = result.data
-            print(f'Generated SQL query: {sql_query}')
+            # The same question asked again reuses its SQL without embedding or the LLM
+            key = " ".join(nl_query.lower().split())
+            sql_query = self._get_cached_sql(key)
+            query_embedding = None
+            if sql_query is None:
+                query_embedding = await self.embedding_model.aembed(nl_query)
+                query_terms = _outlet_query_terms(nl_query)
+                entry = self._outlet_query_semantic_cache.lookup(query_embedding, key=query_terms)
+                if entry is not None:
+                    # A near-identical question was answered before; skip text-to-SQL and the database
+                    _record_tool_call(ToolCall(
+                        "query_outlets_table", {"nl_query": nl_query}, (), entry.result,
+                        generated_sql=entry.generated_sql, cache_hit=True
+                    ))
+                    return entry.result
+                
+                # Generate SQL query using the text-to-SQL agent
+                result = await self.text_to_sql_agent.run(nl_query)
+                sql_query = result.data
+                logger.debug("Generated SQL query: %s", sql_query)
+                self._cache_sql(key, sql_query)
             
             # Check if the AI refused to generate a query
             if sql_query.strip().startswith('--'):
@@ -220,61 +495,32 @@ class AgentTools:
             else:
                 # Apply the same security validation as execute_outlets_query
                 sql_query_clean = sql_query.strip()
-                if not sql_query_clean.upper().startswith('SELECT'):
-                    query_result = "Error: Only SELECT queries are allowed."
-                    generated_sql = sql_query
-                else:
-                    # Check for dangerous keywords
-                    dangerous_keywords = ['INSERT', 'UPDATE', 'DELETE', 'DROP', 'ALTER', 'TRUNCATE', 'CREATE']
-                    sql_upper = sql_query_clean.upper()
-                    dangerous_found = False
-                    for keyword in dangerous_keywords:
-                        if keyword in sql_upper:
-                            query_result = f"Error: {keyword} operations are not allowed."
-                            generated_sql = sql_query
-                            dangerous_found = True
-                            break
+                generated_sql = sql_query
+                query_result = _check_read_only_sql(sql_query_clean)
+                if query_result is None:
+                    # Execute the query on the database
+                    rows = await self.database.execute_query(sql_query_clean, max_rows=self.outlet_query_max_rows + 1)
                     
-                    if not dangerous_found:
-                        # Execute the query on the database
-                        rows = self.database.execute_query(sql_query_clean)
-                        
-                        # Convert results to JSON format
-                        query_result = json.dumps([dict(row._mapping) for row in rows], indent=2)
-                        generated_sql = sql_query
+                    # Convert results to JSON format
+                    query_result = self._format_outlet_rows(rows)
+                    if query_embedding is not None:
+                        self._outlet_query_semantic_cache.insert(
+                            query_embedding, nl_query, query_result, generated_sql, key=query_terms
+                        )
             
             # Collect metadata about this tool call with SQL query included
-            tool_metadata = {
-                "tool_name": "query_outlets_table",
-                "tool_kwargs": {"nl_query": nl_query},
-                "tool_args": (),
-                "result": query_result,
-                "generated_sql": generated_sql
-            }
-            
-            # Store metadata in the instance
-            if not hasattr(self, 'tool_calls_metadata'):
-                self.tool_calls_metadata = []
-            self.tool_calls_metadata.append(tool_metadata)
+            _record_tool_call(ToolCall(
+                "query_outlets_table", {"nl_query": nl_query}, (), query_result,
+                generated_sql=generated_sql, cache_hit=query_embedding is None
+            ))
             
             return query_result
             
         except Exception as e:
             error_msg = f"Error executing query: {str(e)}"
-            print(f"Error in query_outlets_table: {e}")
+            logger.error("Error in query_outlets_table: %s", e)
             
             # Collect metadata for error case too
-            tool_metadata = {
-                "tool_name": "query_outlets_table",
-                "tool_kwargs": {"nl_query": nl_query},
-                "tool_args": (),
-                "result": error_msg,
-                "generated_sql": None
-            }
-            
-            # Store metadata in the instance
-            if not hasattr(self, 'tool_calls_metadata'):
-                self.tool_calls_metadata = []
-            self.tool_calls_metadata.append(tool_metadata)
+            _record_tool_call(ToolCall("query_outlets_table", {"nl_query": nl_query}, (), error_msg))
             
             return error_msg
@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional
+import time
+
+import numpy as np
+
+
+@dataclass
+class CacheEntry:
+    query: str
+    result: Any
+    generated_sql: Optional[str]
+    ts: float
+    key: Optional[Hashable] = None
+
+
+class SemanticCache:
+    """
+    Cache of tool results keyed on query embeddings.
+
+    Near-duplicate questions ("show outlets" / "list all outlets") embed to nearby
+    vectors, so a lookup returns the stored result of the most similar cached query
+    when its cosine similarity is at least `threshold`. Embeddings blur details such as
+    place names ("outlets in Cheras" / "outlets in Damansara"), so a lookup given a `key`
+    only considers entries inserted with an equal key. Embeddings are kept unit-normalized
+    in one preallocated float32 matrix, making a lookup a single matrix-vector product.
+    Entries expire after `ttl` seconds; when full, the least recently used (or an
+    expired) entry is replaced.
+    """
+
+    def __init__(self, dim: int = 512, threshold: float = 0.95, capacity: int = 1024, ttl: float = 7 * 24 * 3600):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._entries: List[Optional[CacheEntry]] = [None] * capacity
+        self._inserted_at = np.zeros(capacity)
+        self._last_used = np.zeros(capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding, key: Optional[Hashable] = None) -> Optional[CacheEntry]:
+        """Return the cached entry most similar to embedding, or None if none clears the threshold"""
+        if self._size == 0:
+            return None
+
+        now = time.monotonic()
+        similarities = self._vectors[:self._size] @ self._normalize(embedding)
+        similarities[self._inserted_at[:self._size] < now - self.ttl] = -np.inf
+        if key is not None:
+            mismatched = np.fromiter((entry.key != key for entry in self._entries[:self._size]), bool, self._size)
+            similarities[mismatched] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        self._last_used[best] = now
+        return self._entries[best]
+
+    def insert(self, embedding, query: str, result: Any, generated_sql: Optional[str] = None, key: Optional[Hashable] = None):
+        """Cache result for the query with the given embedding"""
+        now = time.monotonic()
+        if self._size < self.capacity:
+            slot = self._size
+            self._size += 1
+        else:
+            # Expired entries go first, then the least recently used
+            expired = self._inserted_at < now - self.ttl
+            slot = int(np.argmin(np.where(expired, -np.inf, self._last_used)))
+
+        self._vectors[slot] = self._normalize(embedding)
+        self._entries[slot] = CacheEntry(query=query, result=result, generated_sql=generated_sql, ts=now, key=key)
+        self._inserted_at[slot] = now
+        self._last_used[slot] = now
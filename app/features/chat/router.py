@@ -1,19 +1,85 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse
-import json
+from fastapi.responses import Response, StreamingResponse
+import orjson
 
 from app.models.endpoint_models import ChatRequest, ChatResponse, ChatStreamChunk, ProductSummaryResponse, OutletQueryResponse
 from app.dependencies import get_session_manager, get_chat_service
 from app.features.sessions.session_manager import SessionManager
-from app.features.chat.chat_service.agent_run import ChatAgent
+
+if TYPE_CHECKING:
+    # Type-only import so the agent stack (pydantic_ai, boto3) loads on first request
+    from app.features.chat.chat_service.agent_run import ChatAgent
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Keep proxies (nginx, Cloudflare) from buffering or compressing the event stream,
+# which would hold tokens back until a buffer fills
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity",
+}
+
+# History writes still running after their stream closed; asyncio only keeps weak
+# references to tasks, so they are held here until done
+_pending_history_writes: "set[asyncio.Task]" = set()
+
+
+def _sse_event(chunk: ChatStreamChunk) -> bytes:
+    """Format a stream chunk as a Server-Sent Events frame."""
+    return b"data: " + chunk.model_dump_json(exclude_none=True).encode() + b"\n\n"
+
+
+async def _stream_agent_response(stream, session_id: str, session_manager: SessionManager):
+    """
+    Relay an agent stream as SSE frames. Text deltas are sent as they arrive; the
+    final frame carries the full response and tool calls. The session history is
+    written while the final frame is sent, and the stream ends once it is stored.
+    """
+    # Per-token frames skip model construction and validation; only the final frame
+    # goes through ChatStreamChunk. The part after the chunk text is the same for
+    # every frame, so it is encoded once.
+    frame_tail = b"," + orjson.dumps({"session_id": session_id, "status": "streaming"})[1:] + b"\n\n"
+    try:
+        async for item in stream:
+            if "chunk" in item:
+                yield b'data: {"chunk":' + orjson.dumps(item["chunk"]) + frame_tail
+            else:
+                history_write = asyncio.create_task(
+                    session_manager.update_session_history(session_id, item["message_history"])
+                )
+                _pending_history_writes.add(history_write)
+                history_write.add_done_callback(_pending_history_writes.discard)
+                yield _sse_event(ChatStreamChunk(
+                    response=item["response"],
+                    session_id=session_id,
+                    status="complete",
+                    tool_calls=item["tool_calls"]
+                ))
+                # Shielded so a client disconnecting now doesn't lose the turn
+                try:
+                    await asyncio.shield(history_write)
+                except Exception as e:
+                    logger.error("Error saving stream history for session %s: %s", session_id, e)
+    except Exception as e:
+        logger.error("Error in stream: %s", e)
+        yield _sse_event(ChatStreamChunk(
+            response="Sorry, I encountered an error while processing your request.",
+            session_id=session_id,
+            status="error"
+        ))
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest, 
     session_manager: SessionManager = Depends(get_session_manager),
-    chat_service: ChatAgent = Depends(get_chat_service)
+    chat_service: "ChatAgent" = Depends(get_chat_service)
 ):
     """
     Chat endpoint for interacting with the Zus Coffee assistant.
@@ -24,28 +90,26 @@ async def chat(
         if not request.message.strip():
             raise HTTPException(status_code=400, detail="Message cannot be empty")
         
-        # Clean up old sessions periodically
-        session_manager.cleanup_old_sessions()
-        
         # Handle session management
-        if not request.session_id or not session_manager.session_exists(request.session_id):
+        session = await session_manager.get_session(request.session_id) if request.session_id else None
+        if session is None:
             # Create new session
-            session_id = session_manager.create_session()
+            session_id = await session_manager.create_session()
             message_history = None
-            print(f"[CHAT] Created new session: {session_id}")
+            logger.debug("Created new session: %s", session_id)
         else:
             # Use existing session
             session_id = request.session_id
-            session_manager.update_session_activity(session_id)
-            message_history = session_manager.get_session_history(session_id)
-            print(f"[CHAT] Using existing session: {session_id}, history length: {len(message_history) if message_history else 0}")
+            await session_manager.update_session_activity(session_id)
+            message_history = session.message_history
+            logger.debug("Using existing session: %s, history length: %d", session_id, len(message_history) if message_history else 0)
         
         # Get response from chat service
         response, updated_history, tool_metadata = await chat_service.chat(request.message, message_history)
         
         # Update session with new message history
-        session_manager.update_session_history(session_id, updated_history)
-        print(f"[CHAT] Updated session {session_id} with {len(updated_history)} messages")
+        await session_manager.update_session_history(session_id, updated_history)
+        logger.debug("Updated session %s with %d messages", session_id, len(updated_history))
         
         return ChatResponse(
             response=response,
@@ -55,7 +119,7 @@ async def chat(
         )
     
     except Exception as e:
-        print(f"Error in chat endpoint: {e}")
+        logger.error("Error in chat endpoint: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Sorry, I encountered an error while processing your request."
@@ -65,7 +129,7 @@ async def chat(
 async def get_products_summary(
     query: str = Query(..., description="User question about products"),
     session_manager: SessionManager = Depends(get_session_manager),
-    chat_service: ChatAgent = Depends(get_chat_service)
+    chat_service: "ChatAgent" = Depends(get_chat_service)
 ):
     """
     Product summary endpoint that uses a dedicated product agent to search for and summarize
@@ -76,30 +140,29 @@ async def get_products_summary(
         if not query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        # Clean up old sessions periodically
-        session_manager.cleanup_old_sessions()
-        
         # For products endpoint, we'll use a simple session management
         # You could extend this to support session_id as a query parameter if needed
-        session_id = session_manager.create_session()
+        session_id = await session_manager.create_session()
         
         # Use the dedicated product chat agent
         response, updated_history, tool_metadata = await chat_service.product_chat(query, message_history=None)
         
         # Update session with the conversation
-        session_manager.update_session_history(session_id, updated_history)
+        await session_manager.update_session_history(session_id, updated_history)
         
-        # Extract product information from tool calls for the response
-        retrieved_products = []
+        # Extract product information from tool calls for the response; the searches
+        # already return similarity scores as Python floats
+        result_sets = []
         for tool_call in tool_metadata:
-            if tool_call.get('tool_name') == 'get_similar_products' and isinstance(tool_call.get('result'), list):
-                for product_id, chunk, similarity in tool_call.get('result', []):
-                    product_info = {
-                        "id": product_id,
-                        "content": chunk,
-                        "similarity_score": float(similarity)
-                    }
-                    retrieved_products.append(product_info)
+            if tool_call.tool_name == 'get_similar_products':
+                result_sets.append(tool_call.result)
+            elif tool_call.tool_name == 'get_similar_products_batch':
+                result_sets.extend(tool_call.result.values())
+        retrieved_products = [
+            {"id": product_id, "content": chunk, "similarity_score": similarity}
+            for results in result_sets
+            for product_id, chunk, similarity in results
+        ]
         
         return ProductSummaryResponse(
             query=query,
@@ -111,7 +174,7 @@ async def get_products_summary(
         )
     
     except Exception as e:
-        print(f"Error in products endpoint: {e}")
+        logger.error("Error in products endpoint: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Sorry, I encountered an error while processing your request: {str(e)}"
@@ -122,7 +185,7 @@ async def get_products_summary(
 async def get_outlets_query(
     query: str = Query(..., description="Natural language query about outlets"),
     session_manager: SessionManager = Depends(get_session_manager),
-    chat_service: ChatAgent = Depends(get_chat_service)
+    chat_service: "ChatAgent" = Depends(get_chat_service)
 ):
     """
     Outlet query endpoint that uses a dedicated outlet agent to translate natural language
@@ -132,17 +195,14 @@ async def get_outlets_query(
         if not query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        # Clean up old sessions periodically
-        session_manager.cleanup_old_sessions()
-        
         # For outlets endpoint, create a new session
-        session_id = session_manager.create_session()
+        session_id = await session_manager.create_session()
         
         # Use the dedicated outlet chat agent
         response, updated_history, tool_metadata = await chat_service.outlet_chat(query, message_history=None)
         
         # Update session with the conversation
-        session_manager.update_session_history(session_id, updated_history)
+        await session_manager.update_session_history(session_id, updated_history)
         
         return OutletQueryResponse(
             query=query,
@@ -153,10 +213,134 @@ async def get_outlets_query(
         )
     
     except Exception as e:
-        print(f"Error in outlets endpoint: {e}")
+        logger.error("Error in outlets endpoint: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Sorry, I encountered an error while processing your request: {str(e)}"
         )
 
 
+@router.get("/combined", response_model=ChatResponse)
+async def get_combined_query(
+    query: str = Query(..., description="User question covering both products and outlets"),
+    session_manager: SessionManager = Depends(get_session_manager),
+    chat_service: "ChatAgent" = Depends(get_chat_service)
+):
+    """
+    Combined endpoint for questions that need both product and outlet information.
+    The product and outlet agents run concurrently and their answers are merged.
+    """
+    try:
+        if not query.strip():
+            raise HTTPException(status_code=400, detail="Query cannot be empty")
+        
+        session_id = await session_manager.create_session()
+        
+        response, updated_history, tool_metadata = await chat_service.combined_chat(query, message_history=None)
+        
+        await session_manager.update_session_history(session_id, updated_history)
+        
+        return ChatResponse(
+            response=response,
+            session_id=session_id,
+            status="success",
+            tool_calls=tool_metadata
+        )
+    
+    except Exception as e:
+        logger.error("Error in combined endpoint: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Sorry, I encountered an error while processing your request: {str(e)}"
+        )
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    session_manager: SessionManager = Depends(get_session_manager),
+    chat_service: "ChatAgent" = Depends(get_chat_service)
+):
+    """
+    Streaming version of /chat. Returns Server-Sent Events: text deltas as they are
+    generated, then a final frame with status "complete" and the tool calls.
+    """
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    session = await session_manager.get_session(request.session_id) if request.session_id else None
+    if session is None:
+        session_id = await session_manager.create_session()
+        message_history = None
+    else:
+        session_id = request.session_id
+        await session_manager.update_session_activity(session_id)
+        message_history = session.message_history
+    
+    return StreamingResponse(
+        _stream_agent_response(chat_service.chat_stream(request.message, message_history), session_id, session_manager),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+
+@router.get("/products/stream")
+async def get_products_summary_stream(
+    query: str = Query(..., description="User question about products"),
+    session_manager: SessionManager = Depends(get_session_manager),
+    chat_service: "ChatAgent" = Depends(get_chat_service)
+):
+    """
+    Streaming version of /products. Returns Server-Sent Events with the summary
+    text as it is generated.
+    """
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    session_id = await session_manager.create_session()
+    
+    return StreamingResponse(
+        _stream_agent_response(chat_service.product_chat_stream(query), session_id, session_manager),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+
+@router.get("/outlets/stream")
+async def get_outlets_query_stream(
+    query: str = Query(..., description="Natural language query about outlets"),
+    session_manager: SessionManager = Depends(get_session_manager),
+    chat_service: "ChatAgent" = Depends(get_chat_service)
+):
+    """
+    Streaming version of /outlets. Returns Server-Sent Events with the response
+    text as it is generated.
+    """
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    session_id = await session_manager.create_session()
+    
+    return StreamingResponse(
+        _stream_agent_response(chat_service.outlet_chat_stream(query), session_id, session_manager),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+
+@router.get("/sessions/{session_id}/history")
+async def get_session_history(
+    session_id: str,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
+    """
+    Conversation history for a session. The streaming endpoints don't send the
+    history in their final frame; clients that need it fetch it here.
+    """
+    history = await session_manager.get_session_history(session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    from pydantic_ai.messages import ModelMessagesTypeAdapter
+    
+    return Response(content=ModelMessagesTypeAdapter.dump_json(history), media_type="application/json")
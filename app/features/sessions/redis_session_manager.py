@@ -0,0 +1,120 @@
+from typing import Optional
+import logging
+import pickle
+import secrets
+import time
+from datetime import datetime
+
+from redis.asyncio import Redis
+
+from app.features.sessions.session_manager import Session
+
+logger = logging.getLogger(__name__)
+
+# Set one field and reset the TTL of an existing session in a single atomic step.
+# Separate EXPIRE and HSET calls could recreate a key that expired in between,
+# as a partial hash with no TTL that Redis would never evict.
+_UPDATE_FIELD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisSessionManager:
+    """
+    Manages chat sessions in Redis, with the same interface as SessionManager.
+
+    Each session is a hash under "session:<id>" whose TTL is reset on every update,
+    so Redis expires idle sessions itself and every API worker sees the same sessions.
+    """
+
+    key_prefix = "session:"
+
+    def __init__(self, redis_url: str, session_timeout_hours: int = 24):
+        self.redis = Redis.from_url(redis_url)
+        self.session_timeout_hours = session_timeout_hours
+        self.session_ttl = session_timeout_hours * 3600
+        self._update_field = self.redis.register_script(_UPDATE_FIELD_SCRIPT)
+
+    def _key(self, session_id: str) -> str:
+        return self.key_prefix + session_id
+
+    # History is pickled rather than JSON encoded: it is only ever read back by the API,
+    # and pickle skips rebuilding the pydantic-ai message objects through validation.
+    # The Redis instance must therefore be private to the API.
+    @staticmethod
+    def _dump_history(message_history: list) -> bytes:
+        return pickle.dumps(message_history, protocol=5)
+
+    @staticmethod
+    def _load_history(data: bytes) -> list:
+        return pickle.loads(data)
+
+    async def create_session(self) -> str:
+        """Create a new chat session and return session ID"""
+        session_id = secrets.token_hex(16)
+        now = time.time()
+        key = self._key(session_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={
+                'created_at': now,
+                'last_activity': now,
+                'message_history': self._dump_history([])
+            })
+            pipe.expire(key, self.session_ttl)
+            await pipe.execute()
+        return session_id
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        """Get session data by ID; last_activity is a Unix timestamp here"""
+        data = await self.redis.hgetall(self._key(session_id))
+        if not data:
+            return None
+        return Session(
+            created_at=datetime.fromtimestamp(float(data[b'created_at'])),
+            last_activity=float(data[b'last_activity']),
+            message_history=self._load_history(data[b'message_history'])
+        )
+
+    async def _update_session_field(self, session_id: str, field: str, value) -> bool:
+        """Set one field of an existing session and reset its TTL; False if the session is gone"""
+        return bool(await self._update_field(keys=[self._key(session_id)], args=[field, value, self.session_ttl]))
+
+    async def update_session_activity(self, session_id: str) -> bool:
+        """Update the last activity time for a session"""
+        return await self._update_session_field(session_id, 'last_activity', time.time())
+
+    async def update_session_history(self, session_id: str, message_history: list) -> bool:
+        """Update the message history for a session"""
+        return await self._update_session_field(session_id, 'message_history', self._dump_history(message_history))
+
+    async def get_session_history(self, session_id: str) -> Optional[list]:
+        """Get the message history for a session"""
+        data = await self.redis.hget(self._key(session_id), 'message_history')
+        if data is None:
+            return None
+        return self._load_history(data)
+
+    async def session_exists(self, session_id: str) -> bool:
+        """Check if a session exists"""
+        return bool(await self.redis.exists(self._key(session_id)))
+
+    async def cleanup_old_sessions(self) -> int:
+        """Sessions expire through their Redis TTL, so there is nothing to sweep"""
+        return 0
+
+    async def get_session_count(self) -> int:
+        """Get the total number of active sessions"""
+        count = 0
+        async for _ in self.redis.scan_iter(match=self.key_prefix + "*", count=1000):
+            count += 1
+        return count
+
+    async def clear_all_sessions(self):
+        """Clear all sessions (useful for testing or cleanup)"""
+        async for key in self.redis.scan_iter(match=self.key_prefix + "*", count=1000):
+            await self.redis.delete(key)
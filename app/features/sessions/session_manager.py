@@ -1,77 +1,98 @@
-from typing import Dict, Any, Optional
-import uuid
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+import logging
+import secrets
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Session:
+    """A chat session; slots keep each of the (possibly many thousand) records small"""
+    created_at: datetime
+    last_activity: float
+    message_history: list = field(default_factory=list)
 
 
 class SessionManager:
     """Manages chat sessions with in-memory storage"""
     
-    def __init__(self, session_timeout_hours: int = 24):
-        # In-memory session storage (resets when server restarts)
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, session_timeout_hours: int = 24, max_sessions: int = 10000):
+        # In-memory session storage (resets when server restarts), ordered from least to
+        # most recently active so expired sessions are always at the front
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
         
-        # Session cleanup settings
+        # Session cleanup settings; last_activity is a time.monotonic() timestamp
         self.session_timeout_hours = session_timeout_hours
+        self.session_timeout_seconds = session_timeout_hours * 3600
+        self.max_sessions = max_sessions
     
-    def create_session(self) -> str:
+    async def create_session(self) -> str:
         """Create a new chat session and return session ID"""
-        session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            'created_at': datetime.now(),
-            'last_activity': datetime.now(),
-            'message_history': []
-        }
+        session_id = secrets.token_hex(16)
+        self.sessions[session_id] = Session(created_at=datetime.now(), last_activity=time.monotonic())
+        # Over the cap, the least recently active session goes
+        if len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
         return session_id
     
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+    async def get_session(self, session_id: str) -> Optional[Session]:
         """Get session data by ID"""
         return self.sessions.get(session_id)
     
-    def update_session_activity(self, session_id: str) -> bool:
+    async def update_session_activity(self, session_id: str) -> bool:
         """Update the last activity time for a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id]['last_activity'] = datetime.now()
-            return True
-        return False
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        session.last_activity = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return True
     
-    def update_session_history(self, session_id: str, message_history: list) -> bool:
+    async def update_session_history(self, session_id: str, message_history: list) -> bool:
         """Update the message history for a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id]['message_history'] = message_history
-            return True
-        return False
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        session.message_history = message_history
+        return True
     
-    def get_session_history(self, session_id: str) -> Optional[list]:
+    async def get_session_history(self, session_id: str) -> Optional[list]:
         """Get the message history for a session"""
-        session = self.get_session(session_id)
-        if session:
-            return session['message_history']
-        return None
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        return session.message_history
     
-    def session_exists(self, session_id: str) -> bool:
+    async def session_exists(self, session_id: str) -> bool:
         """Check if a session exists"""
         return session_id in self.sessions
     
-    def cleanup_old_sessions(self) -> int:
+    async def cleanup_old_sessions(self) -> int:
         """Remove sessions older than timeout period. Returns number of cleaned sessions."""
-        cutoff_time = datetime.now() - timedelta(hours=self.session_timeout_hours)
-        expired_sessions = [
-            session_id for session_id, session_data in self.sessions.items()
-            if session_data['last_activity'] < cutoff_time
-        ]
+        cutoff_time = time.monotonic() - self.session_timeout_seconds
         
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
+        # Sessions are in activity order, so only the expired ones at the front are visited
+        expired_count = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_activity >= cutoff_time:
+                break
+            self.sessions.popitem(last=False)
+            expired_count += 1
         
-        if expired_sessions:
-            print(f"Cleaned up {len(expired_sessions)} expired sessions")
+        if expired_count:
+            logger.info("Cleaned up %d expired sessions", expired_count)
         
-        return len(expired_sessions)
+        return expired_count
     
-    def get_session_count(self) -> int:
+    async def get_session_count(self) -> int:
         """Get the total number of active sessions"""
         return len(self.sessions)
     
-    def clear_all_sessions(self):
+    async def clear_all_sessions(self):
         """Clear all sessions (useful for testing or cleanup)"""
         self.sessions.clear()
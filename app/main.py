@@ -1,16 +1,34 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+import asyncio
+import logging
+import logging.handlers
+import queue
 import uvicorn
-import os
 
 from .config import config
+from app.dependencies import get_chat_service, get_database, get_session_manager
 from app.features.chat.router import router as chat_router
 
 from app.models.endpoint_models import *
 
 
+def _start_log_listener() -> logging.handlers.QueueListener:
+    """
+    Route application log records through a queue so the actual writes to stderr happen
+    on a listener thread instead of blocking the event loop.
+    """
+    logging.basicConfig(level=logging.INFO)
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+_log_listener = _start_log_listener()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,14 +49,65 @@ app.add_middleware(
 # Include routers
 app.include_router(chat_router, prefix="/api")
 
+@app.on_event("startup")
+def init_database():
+    """Create the schema once per deployment (INIT_DB=1) instead of on every agent start"""
+    if config.INIT_DB:
+        get_database().create_tables()
+
+@app.on_event("startup")
+async def warm_database_pool():
+    """Open pooled database connections before the first request arrives"""
+    if config.DB_POOL_WARMUP > 0:
+        await get_database().warm_up(config.DB_POOL_WARMUP)
+
+@app.on_event("startup")
+async def warm_chat_service():
+    """Build the agent stack and open its Bedrock connection before the first request arrives"""
+    if config.BEDROCK_WARMUP:
+        chat_service = await get_chat_service()
+        await chat_service.tools.warm_up()
+
+async def _cleanup_sessions_periodically(interval_seconds: float = 60):
+    session_manager = await get_session_manager()
+    while True:
+        await asyncio.sleep(interval_seconds)
+        # One failed sweep (e.g. a Redis blip) must not end the loop for good
+        try:
+            await session_manager.cleanup_old_sessions()
+        except Exception:
+            logger.exception("Session cleanup failed")
+
+@app.on_event("startup")
+async def start_session_cleanup():
+    """Expire old sessions in the background instead of scanning them on every request"""
+    app.state.session_cleanup_task = asyncio.create_task(_cleanup_sessions_periodically())
+
+@app.on_event("shutdown")
+async def stop_session_cleanup():
+    task = app.state.session_cleanup_task
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+@app.on_event("shutdown")
+def stop_log_listener():
+    """Flush queued log records before the process exits"""
+    _log_listener.stop()
+
 # Routes
+# The health payload never changes, so it is serialized once instead of on every probe
+_HEALTH_BODY = HealthResponse(
+    status="healthy",
+    message="Zus Coffee Chatbot API is running"
+).model_dump_json().encode()
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
-        message="Zus Coffee Chatbot API is running"
-    )
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, JSON, String
 from sqlalchemy.ext.declarative import declarative_base
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 
 Base = declarative_base()
 
@@ -9,7 +9,8 @@ class Product(Base):
 
     id = Column(Integer, primary_key=True)
     chunk = Column(JSON, nullable=False)
-    embedding = Column(Vector(512), nullable=False)
+    # Half-precision (FP16) storage halves the bytes read per distance computation
+    embedding = Column(HALFVEC(512), nullable=False)
 
 class Outlet(Base):
     __tablename__ = "outlet"
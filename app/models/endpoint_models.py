@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict, Any
 
 
@@ -7,10 +7,13 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
 
 class ToolMetadata(BaseModel):
+    # Tool calls are recorded as ToolCall named tuples and read by attribute
+    model_config = ConfigDict(from_attributes=True)
     tool_name: str
     tool_kwargs: Dict[str, Any]
     tool_args: List[Any]
     generated_sql: Optional[str] = None
+    cache_hit: Optional[bool] = None
     result: Any
 
 class ChatResponse(BaseModel):
@@ -19,36 +22,16 @@ class ChatResponse(BaseModel):
     status: str = "success"
     tool_calls: Optional[List[ToolMetadata]] = None
 
-class NewSessionResponse(BaseModel):
-    session_id: str
-    message: str
-
-class SessionStatsResponse(BaseModel):
-    active_sessions: int
-    message: str
-
 class HealthResponse(BaseModel):
     status: str
     message: str
 
-class ChatStreamResponse(BaseModel):
-    response: str
-    session_id: str
-    status: str = "success"
-    tool_calls: Optional[List[ToolMetadata]] = None
-
 class ChatStreamChunk(BaseModel):
-    chunk: Optional[str] = None
     response: Optional[str] = None
     session_id: Optional[str] = None
-    message_history: Optional[list] = None
     status: str = "success"
     tool_calls: Optional[List[ToolMetadata]] = None
 
-class ProductSummaryRequest(BaseModel):
-    query: str
-    top_k: Optional[int] = 5
-
 class ProductSummaryResponse(BaseModel):
     query: str
     summary: str
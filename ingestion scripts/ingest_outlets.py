@@ -1,5 +1,6 @@
 import pandas as pd
 from db_models import Outlet, Base
+from sqlalchemy import insert
 from sqlalchemy.orm import sessionmaker
 
 def insert_outlets_from_csv(file_path):
@@ -29,21 +30,22 @@ def insert_outlets_from_csv(file_path):
                 session.commit()
                 print("Cleared existing outlet data")
         
+        # Look up which outlets already exist in one query instead of one per row
+        names = set(df['name'])
+        existing_names = {name for (name,) in session.query(Outlet.name).filter(Outlet.name.in_(names))}
+        
         # Insert new outlets
-        outlets_added = 0
-        for index, row in df.iterrows():
-            # Check if outlet already exists
-            existing_outlet = session.query(Outlet).filter_by(name=row['name']).first()
-            
-            if not existing_outlet:
-                outlet = Outlet(
-                    name=row['name'],
-                    address=row['address']
-                )
-                session.add(outlet)
-                outlets_added += 1
-            else:
-                print(f"Outlet '{row['name']}' already exists, skipping...")
+        new_outlets = []
+        for name, address in zip(df['name'], df['address']):
+            if name in existing_names:
+                print(f"Outlet '{name}' already exists, skipping...")
+                continue
+            existing_names.add(name)
+            new_outlets.append({"name": name, "address": address})
+        
+        if new_outlets:
+            session.execute(insert(Outlet), new_outlets)
+        outlets_added = len(new_outlets)
         
         # Commit the transaction
         session.commit()
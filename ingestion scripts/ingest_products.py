@@ -4,15 +4,11 @@ def ingest_products(jsonpath: str):
     with open(jsonpath, "r", encoding='UTF-8') as f:
         products = json.load(f)
     
-    products_with_embeddings = []
-
-    for product in products:
-        product_json = json.dumps(product, ensure_ascii=False)
-        embedding = embedding_model.generate_embeddings(product_json)
-
-        entry = (product, embedding)
-        products_with_embeddings.append(entry)
+    # Embed every product concurrently over the client's connection pool
+    product_jsons = [json.dumps(product, ensure_ascii=False) for product in products]
+    embeddings = embedding_model.generate_embeddings_batch(product_jsons)
 
+    products_with_embeddings = list(zip(products, embeddings))
 
     database.bulk_add_products(products_with_embeddings)
 
@@ -0,0 +1,30 @@
+import pytest
+
+from app.features.chat.chat_service.agent_run import evaluate_arithmetic
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("12 * 7", "12 * 7 = 84"),
+    ("what is 12 * 7?", "12 * 7 = 84"),
+    ("10 / 4", "10 / 4 = 2.5"),
+    ("(1+2)*3", "(1+2)*3 = 9"),
+    ("3 - 5", "3 - 5 = -2"),
+    ("calculate 100 - 20 - 5", "100 - 20 - 5 = 75"),
+])
+def test_evaluates_arithmetic(message, expected):
+    assert evaluate_arithmetic(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "2024-10-15",
+    "15/10/2024",
+    "what is 2024-10-15?",
+    "calculate 10/15/2024",
+    "012-345-6789",
+    "012-345 6789",
+    "10-5",
+    "3/4",
+    "42",
+])
+def test_rejects_dates_phone_numbers_and_bare_terms(message):
+    assert evaluate_arithmetic(message) is None
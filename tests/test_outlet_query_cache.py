@@ -0,0 +1,63 @@
+import asyncio
+from collections import namedtuple
+
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from app.features.chat.chat_service.agent_tools import AgentTools
+
+OutletRow = namedtuple("OutletRow", ["name", "address"])
+
+OUTLETS = {
+    "Cheras": OutletRow("ZUS Coffee Taman Connaught", "Jalan Cerdas, Cheras"),
+    "Damansara": OutletRow("ZUS Coffee Damansara Uptown", "Jalan SS21/39, Damansara"),
+}
+
+
+class FakeEmbeddings:
+    """Embeds every question to the same vector, the worst case for a semantic cache"""
+
+    async def aembed(self, text):
+        return [1.0] * 512
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.queries = []
+        self.products_version = 0
+
+    async def execute_query(self, query, params=None, fetch=True, max_rows=None):
+        self.queries.append(query)
+        return [row for place, row in OUTLETS.items() if place in query]
+
+
+def text_to_sql(messages, info):
+    question = messages[-1].parts[-1].content
+    place = next(place for place in OUTLETS if place.lower() in question.lower())
+    return ModelResponse(parts=[TextPart(f"SELECT name, address FROM outlet WHERE address ILIKE '%{place}%'")])
+
+
+def test_semantic_cache_does_not_mix_up_locations():
+    database = FakeDatabase()
+    tools = AgentTools(database, FakeEmbeddings(), FunctionModel(text_to_sql))
+
+    async def ask(question):
+        return await tools.query_outlets_table(question)
+
+    damansara = asyncio.run(ask("outlets in Damansara"))
+    cheras = asyncio.run(ask("outlets in Cheras"))
+
+    assert "Damansara Uptown" in damansara
+    assert "Taman Connaught" in cheras and "Damansara" not in cheras
+    assert len(database.queries) == 2
+
+
+def test_semantic_cache_reuses_rephrased_question():
+    database = FakeDatabase()
+    tools = AgentTools(database, FakeEmbeddings(), FunctionModel(text_to_sql))
+
+    first = asyncio.run(tools.query_outlets_table("outlets in Cheras"))
+    second = asyncio.run(tools.query_outlets_table("show me the Zus Coffee outlets in cheras?"))
+
+    assert second == first
+    assert len(database.queries) == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+from pydantic_ai.models.test import TestModel
+
+from app.features.chat.chat_service.agent_tools import AgentTools
+
+
+class FakeEmbeddings:
+    async def aembed(self, text):
+        return [1.0] * 512
+
+
+class FakeDatabase:
+    has_embedding_matrix = False
+
+    def __init__(self):
+        self.searches = 0
+        self.products_version = 0
+
+    async def search_similar_products(self, query_embedding, limit=10, threshold=0.5):
+        self.searches += 1
+        return [(self.searches, {"name": "ZUS All-Can Tumbler"}, 0.9)]
+
+
+def test_similar_products_cache_is_dropped_when_catalog_changes():
+    database = FakeDatabase()
+    tools = AgentTools(database, FakeEmbeddings(), TestModel())
+
+    first = asyncio.run(tools.get_similar_products("tumbler"))
+    assert asyncio.run(tools.get_similar_products("Tumbler")) == first
+    assert database.searches == 1
+
+    database.products_version += 1
+    assert asyncio.run(tools.get_similar_products("tumbler")) != first
+    assert database.searches == 2
+
+
+def test_similar_products_cache_expires():
+    database = FakeDatabase()
+    tools = AgentTools(database, FakeEmbeddings(), TestModel())
+    tools.products_cache_ttl = 0
+
+    asyncio.run(tools.get_similar_products("tumbler"))
+    asyncio.run(tools.get_similar_products("tumbler"))
+    assert database.searches == 2
+
+
+class FakeEmbeddingMatrixDatabase(FakeDatabase):
+    has_embedding_matrix = True
+
+    def search_similar_products_numpy(self, query_embedding, limit=10, threshold=0.5):
+        self.searches += 1
+        return [(0, {"name": "ZUS All-Can Tumbler"}, 0.9)]
+
+    async def search_similar_products_batch(self, query_embeddings, limit=10, threshold=0.5):
+        raise AssertionError("the in-memory matrix should serve batch searches")
+
+
+class FakeBatchEmbeddings(FakeEmbeddings):
+    def generate_embeddings_batch(self, texts):
+        return [[1.0] * 512 for _ in texts]
+
+
+def test_batch_search_shares_backend_and_cache_with_single_search():
+    database = FakeEmbeddingMatrixDatabase()
+    tools = AgentTools(database, FakeBatchEmbeddings(), TestModel())
+
+    single = asyncio.run(tools.get_similar_products("tumbler"))
+    batch = asyncio.run(tools.get_similar_products_batch(["tumbler", "mug"]))
+
+    assert batch["tumbler"] == single == batch["mug"]
+    assert database.searches == 2